@@ -0,0 +1,3 @@
+"""
+Benchmarks of the trading bot hot paths, run them with `python3 -m benchmarks.<name>`
+"""
@@ -0,0 +1,95 @@
+"""
+Load test the stream manager against a fake exchange: ticker throughput,
+event lag, order round trip latency and memory usage
+
+    python3 -m benchmarks.fake_exchange [unicornfy|raw]
+"""
+
+import sys
+import time
+import resource
+
+from functools import partial
+from types import SimpleNamespace
+
+from trader.metrics import Histogram, metrics
+from trader.binance import BinanceCache, BinanceStreamManager
+from trader.mocks.exchange import FakeExchange, FakeBinanceClient, FakeWebSocketManager
+
+SYMBOLS = 1500
+TICK_RATE = 10
+DURATION = 10
+ORDERS = 100
+FILL_LATENCY = 0.01
+ORDER_SYMBOL = "BTCUSDT"
+
+
+def make_config(stream_output):
+    return SimpleNamespace(
+        BINANCE_API_KEY="",
+        BINANCE_API_SECRET="",
+        BINANCE_TLD="com",
+        TICKER_STREAM="all",
+        STREAM_OUTPUT=stream_output,
+        STREAM_MAX_LAG=0,
+        STREAM_STALL_TIMEOUT=0,
+        STREAM_RECORD_PATH="",
+    )
+
+
+def main():
+    stream_output = sys.argv[1] if len(sys.argv) > 1 else "unicornfy"
+    exchange = FakeExchange(
+        symbols=SYMBOLS,
+        tick_rate=TICK_RATE,
+        fill_latency=FILL_LATENCY,
+        balances={"USDT": 1e9},
+        seed=0,
+    )
+    client = FakeBinanceClient(exchange)
+    cache = BinanceCache()
+    updated = []
+
+    stream_manager = BinanceStreamManager(
+        cache,
+        make_config(stream_output),
+        client,
+        [lambda symbols: updated.append(len(symbols))],
+        websocket_manager_class=partial(FakeWebSocketManager, exchange),
+    )
+
+    exchange.start()
+    time.sleep(DURATION)
+
+    round_trip = Histogram("round_trip")
+
+    for _ in range(ORDERS):
+        started = time.perf_counter()
+        order = client.order_limit_buy(symbol=ORDER_SYMBOL, quantity=0.001, price=exchange.price(ORDER_SYMBOL))
+        cache.orders.wait(order["orderId"], lambda order: order.status == "FILLED", 5)
+        round_trip.observe(time.perf_counter() - started - FILL_LATENCY)
+
+    exchange.stop()
+    stream_manager.close()
+
+    snapshot = metrics.snapshot()
+    event_lag = snapshot["stream.market_data.event_lag"]
+    queue_lag = snapshot["stream.market_data.lag"]
+    round_trip = round_trip.snapshot()
+
+    print(f"{SYMBOLS} symbols at {TICK_RATE} ticks/s for {DURATION}s ({stream_output} output)")
+    print(f"    Tickers:     {exchange.events_sent / DURATION:,.0f} sent/s, {sum(updated) / DURATION:,.0f} updated/s")
+    print(f"    Superseded:  {snapshot['stream.market_data.superseded']}")
+    print(f"    Event lag:   p50 {event_lag['p50'] * 1000:.1f} ms, p99 {event_lag['p99'] * 1000:.1f} ms")
+    print(f"    Queue lag:   p50 {queue_lag['p50'] * 1000:.3f} ms, p99 {queue_lag['p99'] * 1000:.3f} ms")
+    print(
+        f"    Round trip:  "
+        f"p50 {round_trip['p50'] * 1000:.3f} ms, "
+        f"p99 {round_trip['p99'] * 1000:.3f} ms "
+        f"(excluding the {FILL_LATENCY * 1000:.0f} ms fill latency)"
+    )
+    print(f"    Max RSS:     {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Compare the idle CPU usage and the event latency of the former polling
+stream processor with the blocking stream consumer
+
+    python3 -m benchmarks.stream_consumer
+"""
+
+import time
+import threading
+
+from collections import deque
+
+from trader.binance.stream_consumer import StreamConsumer
+from trader.metrics import Histogram
+
+IDLE_SECONDS = 5
+EVENTS = 1000
+EVENT_INTERVAL = 0.002
+
+
+class PollingConsumer:
+    """
+    Former stream processor loop: pop from a buffer and sleep 10 ms when it is empty
+    """
+
+    def __init__(self, handler, name):
+        self.handler = handler
+        self.name = name
+        self._buffer = deque()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def put(self, data):
+        self._buffer.append(data)
+
+    def stop(self):
+        self._stopping = True
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopping:
+            try:
+                data = self._buffer.popleft()
+            except IndexError:
+                time.sleep(0.01)
+                continue
+
+            self.handler(data)
+
+
+def measure(consumer_class):
+    latency = Histogram("latency")
+    done = threading.Event()
+
+    def handler(sent):
+        latency.observe(time.perf_counter() - sent)
+
+        if latency.count == EVENTS:
+            done.set()
+
+    consumer = consumer_class(handler, consumer_class.__name__)
+    consumer.start()
+
+    # The main thread sleeps, so the process CPU time is spent by the consumer
+    cpu_time = time.process_time()
+    time.sleep(IDLE_SECONDS)
+    idle_cpu = (time.process_time() - cpu_time) / IDLE_SECONDS * 100
+
+    for _ in range(EVENTS):
+        consumer.put(time.perf_counter())
+        time.sleep(EVENT_INTERVAL)
+
+    done.wait()
+    consumer.stop()
+    return idle_cpu, latency.snapshot()
+
+
+def main():
+    for label, consumer_class in (("Before (polling)", PollingConsumer), ("After (blocking)", StreamConsumer)):
+        idle_cpu, latency = measure(consumer_class)
+        print(label)
+        print(f"    Idle CPU:    {idle_cpu:.3f}%")
+        print(
+            f"    Latency:     "
+            f"p50 {latency['p50'] * 1000:.3f} ms, "
+            f"p99 {latency['p99'] * 1000:.3f} ms, "
+            f"max {latency['max'] * 1000:.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Measure the throughput, in ticker events per second, of parsing all-market
+mini ticker messages with UnicornFy and with the raw JSON fast path
+
+    python3 -m benchmarks.stream_parsing
+"""
+
+import json
+import time
+import random
+
+import numpy as np
+
+from trader.binance import raw_stream
+from trader.binance.ticker_book import TickerBook
+
+SYMBOLS = 1500
+MESSAGES = 200
+
+
+def make_message(symbols, event_time):
+    return json.dumps({
+        "stream": "!miniTicker@arr",
+        "data": [
+            {
+                "e": "24hrMiniTicker",
+                "E": event_time,
+                "s": symbol,
+                "c": f"{random.uniform(0.001, 1000):.8f}",
+                "o": f"{random.uniform(0.001, 1000):.8f}",
+                "h": f"{random.uniform(0.001, 1000):.8f}",
+                "l": f"{random.uniform(0.001, 1000):.8f}",
+                "v": f"{random.uniform(0, 100000):.8f}",
+                "q": f"{random.uniform(0, 100000):.8f}",
+            }
+            for symbol in symbols
+        ],
+    })
+
+
+def process_unicornfy(unicorn_fy, book, message):
+    stream_data = unicorn_fy.binance_com_websocket(message)
+    book.update_many((event["symbol"], event["close_price"]) for event in stream_data["data"])
+
+
+def process_raw(book, message):
+    events = raw_stream.ticker_events(raw_stream.decode(message))
+    symbol_ids = np.array([book.symbols.intern(event["s"]) for event in events], dtype=np.intp)
+    book.update_ids(symbol_ids, np.array([event["c"] for event in events], dtype=np.float64))
+
+
+def measure(process, messages):
+    started = time.perf_counter()
+
+    for message in messages:
+        process(message)
+
+    elapsed = time.perf_counter() - started
+    return len(messages) * SYMBOLS / elapsed, len(messages) / elapsed
+
+
+def main():
+    symbols = [f"COIN{i}USDT" for i in range(SYMBOLS)]
+    messages = [make_message(symbols, 1600000000000 + i * 1000) for i in range(MESSAGES)]
+    candidates = [("Raw", lambda message, book=TickerBook(): process_raw(book, message))]
+
+    try:
+        from unicorn_fy.unicorn_fy import UnicornFy
+        candidates.insert(0, (
+            "UnicornFy",
+            lambda message, book=TickerBook(): process_unicornfy(UnicornFy, book, message),
+        ))
+    except ImportError:
+        print("UnicornFy is not installed, skipping")
+
+    print(f"{MESSAGES} messages of {SYMBOLS} tickers ({raw_stream.loads.__module__} decoder)")
+
+    for label, process in candidates:
+        events_per_second, messages_per_second = measure(process, messages)
+        print(f"    {label:<10} {events_per_second:>14,.0f} events/s {messages_per_second:>10,.1f} messages/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Balance book tests
+"""
+
+import pytest
+
+balance_book = pytest.importorskip("trader.binance.balance_book")
+
+
+def make_book():
+    book = balance_book.BalanceBook()
+    book.load({"BTC": 1.0, "USDT": 100.0}, 1000)
+    return book
+
+
+def test_delta_included_in_position_is_ignored():
+    book = make_book()
+
+    # The account position already includes the delta cleared before it
+    assert book.apply_position({"USDT": 150.0}, 2000)
+    assert not book.apply_delta("USDT", 50.0, 1500)
+    assert not book.apply_delta("USDT", 50.0, 2000)
+    assert book.get("USDT") == 150.0
+
+
+def test_delta_after_position_is_applied_once():
+    book = make_book()
+
+    assert book.apply_position({"USDT": 150.0}, 2000)
+    assert book.apply_delta("USDT", 50.0, 2500)
+    assert not book.apply_delta("USDT", 50.0, 2500)
+    assert book.get("USDT") == 200.0
+    assert book.update_time == 2500
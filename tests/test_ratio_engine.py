@@ -0,0 +1,116 @@
+"""
+Ratio engine tests
+"""
+
+import math
+
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+ratio_engine = pytest.importorskip("trader.ratio_engine")
+
+BRIDGE = "USDT"
+
+# C has no price, the C -> A pair is disabled and B -> D has no ratio yet
+PRICES = {"A": 10.0, "B": 2.0, "C": None, "D": 5.0}
+FEES = {"A": 0.001, "B": 0.00075, "C": 0.001, "D": 0.002}
+RATIOS = {
+    ("A", "B"): 4.8, ("A", "C"): 1.0, ("A", "D"): 1.9,
+    ("B", "A"): 0.21, ("B", "C"): 0.5, ("B", "D"): None,
+    ("C", "B"): 2.0, ("C", "D"): 0.4,
+    ("D", "A"): 0.52, ("D", "B"): 2.4, ("D", "C"): 3.0,
+}
+
+
+def make_config(use_margin):
+    return SimpleNamespace(BRIDGE_COIN_SYMBOL=BRIDGE, USE_MARGIN=use_margin, SCOUT_MARGIN=0.8, SCOUT_MULTIPLIER=5)
+
+
+def make_pair(from_symbol, to_symbol, ratio):
+    return SimpleNamespace(
+        from_coin=SimpleNamespace(symbol=from_symbol),
+        to_coin=SimpleNamespace(symbol=to_symbol),
+        from_coin_id=from_symbol,
+        to_coin_id=to_symbol,
+        ratio=ratio,
+    )
+
+
+def expected_score(config, pair, coin_price=None):
+    """
+    Score of a jump as computed pair by pair before the ratio engine, `None`
+    when the pair cannot be scored
+    """
+    coin_price = coin_price or PRICES[pair.from_coin_id]
+    optional_coin_price = PRICES[pair.to_coin_id]
+
+    if coin_price is None or optional_coin_price is None or pair.ratio is None:
+        return None
+
+    coin_opt_coin_ratio = coin_price / optional_coin_price
+    from_fee = FEES[pair.from_coin_id]
+    to_fee = FEES[pair.to_coin_id]
+    transaction_fee = from_fee + to_fee - from_fee * to_fee
+
+    if config.USE_MARGIN == "yes":
+        return (1 - transaction_fee) * coin_opt_coin_ratio / pair.ratio - 1 - config.SCOUT_MARGIN / 100
+    return (coin_opt_coin_ratio - transaction_fee * config.SCOUT_MULTIPLIER * coin_opt_coin_ratio) - pair.ratio
+
+
+def make_engine(config, pairs):
+    symbols = [symbol + BRIDGE for symbol in sorted(PRICES)]
+    prices = np.array([np.nan if PRICES[symbol] is None else PRICES[symbol] for symbol in sorted(PRICES)])
+
+    engine = ratio_engine.RatioEngine(config)
+    engine.load(pairs, symbols.index)
+    engine.update_prices(prices)
+    engine.update_fees(lambda coin, selling: FEES[coin.symbol])
+    return engine
+
+
+def assert_score(config, pair, score):
+    expected = expected_score(config, pair)
+
+    if expected is None:
+        assert math.isnan(score), pair
+    else:
+        assert score == pytest.approx(expected, rel=1e-12), pair
+
+
+@pytest.mark.parametrize("use_margin", ["yes", "no"])
+def test_scores_match_per_pair_formula(use_margin):
+    config = make_config(use_margin)
+    pairs = [make_pair(from_symbol, to_symbol, ratio) for (from_symbol, to_symbol), ratio in RATIOS.items()]
+    engine = make_engine(config, pairs)
+    matrix = engine.score_matrix()
+
+    for symbol in PRICES:
+        i = engine.index[symbol]
+        scores = engine.score_from(symbol)
+        jumps = dict(engine.pairs_from(symbol))
+
+        for j, other in enumerate(engine.coins):
+            pair = jumps.get(j, None)
+
+            if pair is None:
+                # Jumps to the same coin and disabled pairs are never scored
+                assert (symbol, other.symbol) not in RATIOS or symbol == other.symbol
+                assert math.isnan(scores[j]) and math.isnan(matrix[i, j])
+                continue
+
+            assert_score(config, pair, scores[j])
+            assert_score(config, pair, matrix[i, j])
+
+
+@pytest.mark.parametrize("use_margin", ["yes", "no"])
+def test_score_from_uses_given_coin_price(use_margin):
+    config = make_config(use_margin)
+    pair = make_pair("A", "B", RATIOS[("A", "B")])
+    engine = make_engine(config, [pair])
+    coin_price = PRICES["A"] * 2
+    score = engine.score_from("A", coin_price)[engine.index["B"]]
+
+    assert score == pytest.approx(expected_score(config, pair, coin_price), rel=1e-12)
+    assert engine.score_from("A")[engine.index["B"]] == pytest.approx(expected_score(config, pair), rel=1e-12)
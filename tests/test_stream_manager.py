@@ -0,0 +1,53 @@
+"""
+Stream manager tests
+"""
+
+import json
+
+from functools import partial
+from types import SimpleNamespace
+
+import pytest
+
+stream_manager = pytest.importorskip("trader.binance.stream_manager")
+
+from trader.binance import stream_consumer
+from trader.binance.cache import BinanceCache
+from trader.mocks.exchange import FakeExchange, FakeWebSocketManager
+
+
+def make_config(stream_output):
+    return SimpleNamespace(
+        STREAM_OUTPUT=stream_output,
+        STREAM_MAX_LAG=5,
+        STREAM_STALL_TIMEOUT=30,
+        STREAM_RECORD_PATH="",
+        BINANCE_TLD="com",
+        BINANCE_API_KEY="",
+        BINANCE_API_SECRET="",
+        TICKER_STREAM="all",
+    )
+
+
+@pytest.mark.parametrize("stream_output, ack", [
+    ("UnicornFy", {"result": None, "id": 1}),
+    ("raw", json.dumps({"result": None, "id": 1})),
+])
+def test_subscription_ack_is_ignored(monkeypatch, stream_output, ack):
+    errors = []
+    monkeypatch.setattr(stream_consumer.logger, "exception", errors.append)
+
+    manager = stream_manager.BinanceStreamManager(
+        BinanceCache(),
+        make_config(stream_output),
+        client=None,
+        websocket_manager_class=partial(FakeWebSocketManager, FakeExchange(seed=0)),
+    )
+
+    try:
+        manager._receive_stream_data(ack)
+    finally:
+        # Stopping the consumers drains their queues
+        manager.close()
+
+    assert not errors
@@ -5,14 +5,16 @@ Let's go tradin'
 import os
 import time
 
-from signal import SIGINT, SIGTERM
+from signal import SIGINT, SIGTERM, SIG_DFL, signal
 from urllib3.exceptions import ReadTimeoutError
 from requests.exceptions import ReadTimeout
 from binance.exceptions import BinanceAPIException
 
 from trader import Config, Database, Scheduler
 from trader.logger import logger, term
+from trader.metrics import metrics
 from trader.binance import BinanceManager
+from trader.scout_trigger import ScoutTrigger
 from trader.strategies import get_strategy
 
 
@@ -20,14 +22,28 @@ class ControlledException(Exception):
     pass
 
 
+def exit_on_sigterm(signum, frame):
+    logger.warning(f"Received termination signal ({signum}), exiting...")
+    raise SystemExit(0)
+
+
 def main():
     logger.over("Starting process...")
 
     config = Config()
-    database = Database(config)
+    database = Database(config, writer=True)
 
     logger.over("Setting up Binance API manager...")
-    manager = BinanceManager(config, database)
+
+    if config.FAKE_EXCHANGE == "yes":
+        # Imported here so that the backtesting cache of the mocks is only opened when needed
+        from trader.mocks import FakeExchange, FakeBinanceManager
+
+        exchange = FakeExchange(config.COINS_LIST, config.BRIDGE_COIN_SYMBOL)
+        exchange.start()
+        manager = FakeBinanceManager(config, database, exchange)
+    else:
+        manager = BinanceManager(config, database)
 
     logger.over("Testing connection to Binance...")
     manager.test_connection()
@@ -53,20 +69,39 @@ def main():
     trader.display_balance()
 
     schedule = Scheduler()
-    schedule.every(config.SCOUT_SLEEP_TIME).seconds.do(trader.scout).tag("scout")
+    scout_trigger = None
+
+    if config.SCOUT_MODE == "event" and manager.stream_manager:
+        logger.info("Scouting on ticker updates")
+        scout_trigger = ScoutTrigger(config.SCOUT_DEBOUNCE, config.SCOUT_MIN_INTERVAL)
+        scout_trigger.watch(trader.get_watched_symbols())
+        manager.add_ticker_listener(scout_trigger.notify)
+    else:
+        schedule.every(config.SCOUT_SLEEP_TIME).seconds.do(trader.run_scout).tag("scout")
+
     schedule.every(1).minutes.do(trader.update_values).tag("update value history")
+    schedule.every(12).hours.do(manager.fee_schedule.refresh).tag("refresh trade fees")
+    schedule.every(1).minutes.do(metrics.dump).tag("publish metrics")
     schedule.every(1).minutes.do(database.prune_scout_history).tag("prune scout history")
     schedule.every(1).hours.do(database.prune_value_history).tag("prune value history")
     schedule.every(1).days.at('07:00:00').do(trader.display_balance).tag("display balance")
     schedule.every(1).days.at('19:00:00').do(trader.display_balance).tag("display balance")
 
+    # Stopping the container sends SIGTERM, unwind so that the pending ratios and scout history are written
+    signal(SIGTERM, exit_on_sigterm)
+
     try:
         reconnection_attempts = 0
 
         while True:
             try:
                 schedule.run_pending()
-                time.sleep(1)
+
+                if scout_trigger is None:
+                    time.sleep(1)
+                elif scout_trigger.wait(1):
+                    trader.run_scout()
+                    scout_trigger.watch(trader.get_watched_symbols())
 
             except (ReadTimeoutError, ReadTimeout):
                 logger.warning(f"Connection to API manager timed out")
@@ -85,9 +120,14 @@ def main():
                 else:
                     raise ControlledException(f"Maximum reconnection attempts reached {attempts_format}")
     finally:
+        # The process kills itself with SIGTERM once done
+        signal(SIGTERM, SIG_DFL)
+
         if manager.stream_manager:
             manager.stream_manager.close()
 
+        database.close()
+
 
 if __name__ == "__main__":
     try:
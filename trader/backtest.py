@@ -64,7 +64,7 @@ def backtest(
 
     while manager.datetime < end_date:
         try:
-            trader.scout()
+            trader.run_scout()
         except Exception:  # pylint: disable=broad-except
             logger.warning(format_exc())
         manager.increment(interval)
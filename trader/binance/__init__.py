@@ -1,5 +1,11 @@
+from .balance_book import BalanceBook
+from .symbol_table import SymbolTable
+from .ticker_book import TickerBook
 from .cache import BinanceCache
+from .exchange_info import BinanceExchangeInfo
+from .fee_schedule import BinanceFeeSchedule
 from .order import BinanceOrder
+from .order_store import BinanceOrderStore
 from .order_guard import BinanceOrderGuard
 from .api_manager import BinanceManager
 from .stream_manager import BinanceStreamManager
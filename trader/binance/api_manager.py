@@ -9,49 +9,99 @@ import traceback
 from cachetools import TTLCache, cached
 from binance.client import Client as BinanceClient
 from binance.exceptions import BinanceAPIException
+from unicorn_binance_websocket_api import BinanceWebSocketApiManager
 
 from trader.logger import logger, term, pretty
+from trader.metrics import metrics
 from trader.models import Coin
+from trader.market_snapshot import MarketSnapshot
 from trader.binance.stream_manager import BinanceStreamManager
 from trader.binance.cache import BinanceCache
+from trader.binance.exchange_info import BinanceExchangeInfo, EXCHANGE_INFO_PATH
+from trader.binance.fee_schedule import BinanceFeeSchedule, BNB_COIN
 
-BNB_COIN = "BNB"
+ORDER_CANCEL_RECHECK_INTERVAL = 1
+BALANCE_CONFIRMATION_TIMEOUT = 10
 
 
 class BinanceManager:
 
+    # Overridden to point the manager at another exchange
+    websocket_manager_class = BinanceWebSocketApiManager
+    exchange_info_path = EXCHANGE_INFO_PATH
+
     def __init__(self, config, database):
         self.database = database
         self.config = config
         self.logger = logger
 
-        self.client = BinanceClient(
-            config.BINANCE_API_KEY,
-            config.BINANCE_API_SECRET,
-            tld=config.BINANCE_TLD,
-        )
-
+        self.client = self.create_client()
         self.cache = BinanceCache()
+        self.exchange_info = BinanceExchangeInfo(self.client, self.exchange_info_path)
+        self.fee_schedule = BinanceFeeSchedule(self)
+        self.ticker_listeners = []
+        self.ticker_coins = list(config.COINS_LIST)
         self.stream_manager = None
         self.setup_websockets()
 
+        database.add_coins_listener(self.subscribe_tickers)
+
     def setup_websockets(self):
         self.stream_manager = BinanceStreamManager(
             self.cache,
             self.config,
             self.client,
+            self.ticker_listeners,
+            self.get_ticker_markets(self.ticker_coins),
+            self.websocket_manager_class,
         )
 
-    def reconnect(self):
-        if isinstance(self.stream_manager, BinanceStreamManager):
-            self.stream_manager.close()
-
-        self.client = BinanceClient(
+    def create_client(self):
+        return BinanceClient(
             self.config.BINANCE_API_KEY,
             self.config.BINANCE_API_SECRET,
             tld=self.config.BINANCE_TLD,
         )
 
+    def get_ticker_markets(self, coin_symbols):
+        """
+        Get the symbols whose price is needed to trade the given coins: every coin,
+        BTC and BNB against the bridge, BTC, BNB and the balance coin
+        """
+        bases = {*coin_symbols, "BTC", BNB_COIN}
+        quotes = {self.config.BRIDGE_COIN_SYMBOL, "BTC", BNB_COIN, self.config.BALANCE_COIN_SYMBOL}
+
+        return {
+            symbol
+            for base in bases
+            for quote in quotes
+            if base != quote
+            for symbol in (base + quote, quote + base)
+            if self.exchange_info.has_symbol(symbol)
+        }
+
+    def subscribe_tickers(self, coin_symbols):
+        """
+        Update the ticker subscriptions when the traded coins change
+        """
+        self.ticker_coins = list(coin_symbols)
+
+        if self.stream_manager is not None:
+            self.stream_manager.set_ticker_markets(self.get_ticker_markets(self.ticker_coins))
+
+    def add_ticker_listener(self, listener):
+        """
+        Register a callable to be notified with the set of symbols whose
+        price changed, kept across reconnections
+        """
+        self.ticker_listeners.append(listener)
+
+    def reconnect(self):
+        if isinstance(self.stream_manager, BinanceStreamManager):
+            self.stream_manager.close()
+
+        self.client = self.create_client()
+        self.exchange_info.client = self.client
         self.setup_websockets()
 
     def test_connection(self):
@@ -64,91 +114,151 @@ class BinanceManager:
         except BinanceAPIException:
             raise Exception("Couldn't access Binance API - API keys may be wrong or lack sufficient permissions")
 
-    # @cached(cache=TTLCache(maxsize=1, ttl=43200))
     def get_trade_fees(self):
-        return {ticker["symbol"]: float(ticker["takerCommission"]) for ticker in self.client.get_trade_fee()}
+        if not self.fee_schedule.base_fees:
+            self.fee_schedule.refresh()
+        return self.fee_schedule.base_fees
 
     @cached(cache=TTLCache(maxsize=1, ttl=60))
     def get_using_bnb_for_fees(self):
         return self.client.get_bnb_burn_spot_margin()["spotBNBBurn"]
 
+    def update_fees(self, coins):
+        """
+        Precompute the effective fees of the given coins against the bridge coin,
+        called once per scout tick
+        """
+        self.fee_schedule.update(coins, self.config.BRIDGE_COIN)
+
     def get_fee(self, origin_coin, target_coin, selling):
-        base_fee = self.get_trade_fees()[origin_coin + target_coin]
+        return self.fee_schedule.get_fee(origin_coin, target_coin, selling)
 
-        if not self.get_using_bnb_for_fees():
-            return base_fee
+    def get_account(self):
+        """
+        Get account information
+        """
+        return self.client.get_account()
 
-        # The discount is only applied if we have enough BNB to cover the fee
-        amount_trading = (
-            self._sell_quantity(origin_coin.symbol, target_coin.symbol)
-            if selling
-            else self._buy_quantity(origin_coin.symbol, target_coin.symbol)
-        )
+    def get_ticker_price(self, ticker_symbol):
+        """
+        Get ticker price of a specific coin
+        """
+        return self._get_ticker_price(self.cache.tickers.intern(ticker_symbol))
 
-        fee_amount = amount_trading * base_fee * 0.75
+    def get_price(self, origin_symbol, target_symbol):
+        """
+        Get the price of the origin coin in the target coin, without building
+        the ticker symbol once it is known
+        """
+        return self._get_ticker_price(self.cache.tickers.symbols.pair_id(origin_symbol, target_symbol))
 
-        if origin_coin.symbol == BNB_COIN:
-            fee_amount_bnb = fee_amount
-        else:
-            origin_price = self.get_ticker_price(origin_coin + Coin(BNB_COIN))
+    def _get_ticker_price(self, symbol_id):
+        price = self.cache.tickers.get_id(symbol_id)
 
-            if origin_price is None:
-                return base_fee
+        if price is None:
+            ticker_symbol = self.cache.tickers.symbols.symbol(symbol_id)
 
-            fee_amount_bnb = fee_amount * origin_price
+            if ticker_symbol in self.cache.tickers.non_existent:
+                return None
 
-        bnb_balance = self.get_currency_balance(BNB_COIN)
+            # Unknown symbols are marked as non-existent by the refresh
+            self.cache.tickers.refresh(self.client, (ticker_symbol,))
+            price = self.cache.tickers.get_id(symbol_id)
 
-        if bnb_balance >= fee_amount_bnb:
-            return base_fee * 0.75
-        return base_fee
+        return price
 
-    def get_account(self):
+    def symbol_id(self, ticker_symbol):
         """
-        Get account information
+        Get the id of a ticker symbol, indexing the arrays of `get_ticker_prices`
         """
-        return self.client.get_account()
+        return self.cache.tickers.intern(ticker_symbol)
 
-    def get_ticker_price(self, ticker_symbol):
+    def get_ticker_prices(self):
         """
-        Get ticker price of a specific coin
+        Get the price of every ticker as a read-only array indexed by symbol id,
+        `NaN` for unknown prices
         """
-        price = self.cache.ticker_values.get(ticker_symbol, None)
+        return self.cache.tickers.snapshot.prices
 
-        if price is None and ticker_symbol not in self.cache.non_existent_tickers:
-            self.cache.ticker_values = {
-                ticker["symbol"]: float(ticker["price"])
-                for ticker in self.client.get_symbol_ticker()
-            }
-            logger.debug(f"Ticker prices fetched:\n{pretty(self.cache.ticker_values)}")
-            price = self.cache.ticker_values.get(ticker_symbol, None)
+    def refresh_stale_tickers(self, ticker_symbols):
+        """
+        Fetch the prices that are missing or older than the maximum price age
+        """
+        stale_symbols = self.cache.tickers.stale_symbols(ticker_symbols, self.config.MAX_PRICE_AGE)
 
-            if price is None:
-                logger.debug(f"Ticker {term.yellow_bold(ticker_symbol)} not found, skipping")
-                self.cache.non_existent_tickers.add(ticker_symbol)
+        if stale_symbols:
+            self.cache.tickers.refresh(self.client, stale_symbols)
 
-        return price
+    def is_ticker_stale(self, ticker_symbol):
+        """
+        Check whether the price of a ticker is too old to trade on
+        """
+        return self.cache.tickers.is_stale(ticker_symbol, self.config.MAX_PRICE_AGE)
+
+    def capture_market(self, coins):
+        """
+        Capture the prices, balances, fees and filters needed to scout the
+        given coins against the bridge coin, at once
+        """
+        bridge_coin = self.config.BRIDGE_COIN
+        ticker_symbols = [coin + bridge_coin for coin in coins]
+
+        for ticker_symbol in ticker_symbols:
+            self.symbol_id(ticker_symbol)
+
+        self.refresh_stale_tickers(ticker_symbols)
+
+        # Coins without a market against the bridge coin have neither fees nor filters
+        traded_coins = [
+            coin for coin, ticker_symbol in zip(coins, ticker_symbols)
+            if self.exchange_info.has_symbol(ticker_symbol)
+        ]
+
+        return MarketSnapshot(
+            coins,
+            bridge_coin.symbol,
+            self.cache.tickers.symbols,
+            self.get_ticker_prices(),
+            self.get_balances(),
+            {
+                (coin.symbol, selling): self.get_fee(coin, bridge_coin, selling)
+                for coin in traded_coins
+                for selling in (True, False)
+            },
+            {
+                coin.symbol: self.get_min_notional(coin.symbol, bridge_coin.symbol)
+                for coin in traded_coins
+            },
+        )
+
+    def get_balances(self):
+        """
+        Get the free balance of every asset as a read-only mapping
+        """
+        if not self.cache.balances.synced:
+            self.fetch_balances()
+
+        return self.cache.balances.balances
 
     def get_currency_balance(self, currency_symbol, force=False):
         """
         Get balance of a specific coin
         """
-        with self.cache.open_balances() as cache_balances:
-            balance = cache_balances.get(currency_symbol, None)
+        if force or not self.cache.balances.synced:
+            self.fetch_balances()
 
-            if force or balance is None:
-                cache_balances.clear()
-                cache_balances.update({
-                    currency_balance["asset"]: float(currency_balance["free"])
-                    for currency_balance in self.client.get_account()["balances"]
-                })
-                logger.debug(f"Balances fetched:\n{pretty(cache_balances)}")
+        return self.cache.balances.get(currency_symbol, 0.0)
 
-                if currency_symbol not in cache_balances:
-                    cache_balances[currency_symbol] = 0.0
-                    return 0.0
-                return cache_balances.get(currency_symbol, 0.0)
-            return balance
+    def fetch_balances(self):
+        """
+        Reload the whole balance book from the account information
+        """
+        account = self.client.get_account()
+        self.cache.balances.load(
+            {currency_balance["asset"]: float(currency_balance["free"]) for currency_balance in account["balances"]},
+            account.get("updateTime", 0),
+        )
+        logger.debug(f"Balances fetched:\n{pretty(dict(self.cache.balances.balances))}")
 
     def retry(self, func, *args, **kwargs):
         time.sleep(1)
@@ -167,40 +277,25 @@ class BinanceManager:
         return None
 
     def get_symbol_filter(self, origin_symbol, target_symbol, filter_type):
-        return next(
-            _filter
-            for _filter in (self.client.get_symbol_info(origin_symbol + target_symbol) or {}).get("filters", {})
-            if _filter.get("filterType") == filter_type
-        )
+        return self.exchange_info.get_filter(origin_symbol + target_symbol, filter_type)
 
-    @cached(cache=TTLCache(maxsize=2000, ttl=43200))
     def get_alt_tick(self, origin_symbol: str, target_symbol: str):
-        step_size = self.get_symbol_filter(origin_symbol, target_symbol, "LOT_SIZE")["stepSize"]
+        step_size = self.exchange_info.lot_size(origin_symbol + target_symbol)["stepSize"]
 
         if step_size.find("1") == 0:
             return 1 - step_size.find(".")
         return step_size.find("1") - 1
 
-    @cached(cache=TTLCache(maxsize=2000, ttl=43200))
     def get_min_notional(self, origin_symbol, target_symbol):
-        return float(self.get_symbol_filter(origin_symbol, target_symbol, "MIN_NOTIONAL")["minNotional"])
+        return float(self.exchange_info.min_notional(origin_symbol + target_symbol)["minNotional"])
 
     def _wait_for_order(self, order_id, origin_symbol, target_symbol):
-        while True:
-            order_status = self.cache.orders.get(order_id, None)
-
-            if order_status is not None:
-                break
-
-            logger.debug(f"Waiting for creation of order <{order_id}>")
-            time.sleep(1)
-
+        logger.debug(f"Waiting for creation of order <{order_id}>")
+        order_status = self.cache.orders.wait(order_id)
         logger.debug(f"Order created:\n{pretty(order_status)}")
 
         while order_status.status != "FILLED":  # type: ignore
             try:
-                order_status = self.cache.orders.get(order_id, None)
-                assert order_status is not None
                 logger.debug(f"Waiting for fulfillment of order <{order_id}>")
 
                 if self._should_cancel_order(order_status):
@@ -234,7 +329,13 @@ class BinanceManager:
                     logger.over("Scouting...")
                     return None
 
-                time.sleep(1)
+                # Wake up on the next execution report, or when the order may have to be cancelled
+                previous_status = order_status
+                order_status = self.cache.orders.wait(
+                    order_id,
+                    lambda order: order is not previous_status,
+                    self._time_until_cancel(order_status),
+                )
             except BinanceAPIException as e:
                 logger.warning(e)
                 time.sleep(1)
@@ -249,14 +350,29 @@ class BinanceManager:
         with order_guard:
             return self._wait_for_order(order_id, origin_symbol, target_symbol)
 
+    def _order_timeout(self, order_status):
+        if order_status.side == "SELL":
+            return float(self.config.SELL_TIMEOUT)
+        return float(self.config.BUY_TIMEOUT)
+
+    def _time_until_cancel(self, order_status):
+        """
+        Number of seconds before the order times out, `None` if it never does
+        """
+        timeout = self._order_timeout(order_status)
+
+        if not timeout:
+            return None
+
+        remaining = order_status.time / 1000 + timeout * 60 - time.time()
+
+        # Partially filled buy orders are only cancelled once the price moved away,
+        # check again regularly once they timed out
+        return max(remaining, ORDER_CANCEL_RECHECK_INTERVAL)
+
     def _should_cancel_order(self, order_status):
         minutes = (time.time() - order_status.time / 1000) / 60
-        timeout = 0
-
-        if order_status.side == "SELL":
-            timeout = float(self.config.SELL_TIMEOUT)
-        else:
-            timeout = float(self.config.BUY_TIMEOUT)
+        timeout = self._order_timeout(order_status)
 
         if timeout and minutes > timeout and order_status.status == "NEW":
             return True
@@ -293,9 +409,6 @@ class BinanceManager:
         origin_symbol = origin_coin.symbol
         target_symbol = target_coin.symbol
 
-        with self.cache.open_balances() as balances:
-            balances.clear()
-
         origin_balance = self.get_currency_balance(origin_symbol)
         target_balance = self.get_currency_balance(target_symbol)
         from_coin_price = self.get_ticker_price(origin_symbol + target_symbol)
@@ -368,9 +481,6 @@ class BinanceManager:
         origin_symbol = origin_coin.symbol
         target_symbol = target_coin.symbol
 
-        with self.cache.open_balances() as balances:
-            balances.clear()
-
         origin_balance = self.get_currency_balance(origin_symbol)
         target_balance = self.get_currency_balance(target_symbol)
         from_coin_price = self.get_ticker_price(origin_symbol + target_symbol)
@@ -406,10 +516,7 @@ class BinanceManager:
         if order is None:
             return None
 
-        new_balance = self.get_currency_balance(origin_symbol)
-
-        while new_balance >= origin_balance:
-            new_balance = self.get_currency_balance(origin_symbol, True)
+        self._confirm_sale_proceeds(target_symbol, target_balance)
 
         logger.info(
             f"{term.lightcoral_bold('SELL')} "
@@ -422,6 +529,31 @@ class BinanceManager:
         trade_log.set_complete(order.cumulative_quote_qty)
         return order
 
+    def _confirm_sale_proceeds(self, symbol, target_balance):
+        """
+        Wait for the user data stream to credit the proceeds of a filled sell order,
+        falling back to a single account fetch
+        """
+        # Placing the order already locks the origin balance, only the fill credits the target one
+        started = time.monotonic()
+        new_balance = self.cache.balances.wait(
+            symbol,
+            lambda balance: balance > target_balance,
+            BALANCE_CONFIRMATION_TIMEOUT,
+        )
+
+        if new_balance is None:
+            metrics.counter("balance_confirmation.fallbacks").increment()
+            new_balance = self.get_currency_balance(symbol, True)
+
+            if new_balance <= target_balance:
+                logger.warning(f"Balance of {term.yellow_bold(symbol)} not updated after selling")
+
+        elapsed = time.monotonic() - started
+        metrics.histogram("balance_confirmation.seconds").observe(elapsed)
+        logger.debug(f"Balance of {term.yellow_bold(symbol)} confirmed in {elapsed:.3f}s")
+        return new_balance
+
     def collate_coins(self, target_symbol):
         total = .0
         enabled_symbols = {coin.symbol for coin in self.database.get_coins(only_enabled=True)}
@@ -434,13 +566,13 @@ class BinanceManager:
                 total += balance
                 continue
 
-            price = self.get_ticker_price(target_symbol + symbol)
+            price = self.get_price(target_symbol, symbol)
 
             if price is not None:
                 total += balance / price
                 continue
 
-            price = self.get_ticker_price(symbol + target_symbol)
+            price = self.get_price(symbol, target_symbol)
 
             if price is not None:
                 total += balance * price
@@ -0,0 +1,111 @@
+"""
+Binance balance book
+"""
+
+import threading
+
+from types import MappingProxyType
+from collections import namedtuple
+
+from trader.logger import logger, term
+
+BalanceSnapshot = namedtuple("BalanceSnapshot", ("balances", "synced", "update_time", "version"))
+
+
+class BalanceBook:
+    """
+    Free balance of every asset, loaded from the account and kept up to date
+    with the newer user data events until invalidated. Every change publishes
+    a new `BalanceSnapshot`.
+    """
+
+    def __init__(self):
+        self.snapshot = BalanceSnapshot(MappingProxyType({}), False, 0, 0)
+        self._condition = threading.Condition()
+
+    @property
+    def balances(self):
+        return self.snapshot.balances
+
+    @property
+    def synced(self):
+        return self.snapshot.synced
+
+    @property
+    def update_time(self):
+        return self.snapshot.update_time
+
+    @property
+    def version(self):
+        return self.snapshot.version
+
+    def get(self, asset, default=None):
+        return self.snapshot.balances.get(asset, default)
+
+    def wait(self, asset, predicate, timeout):
+        """
+        Block until the balance of the asset matches the predicate, return
+        the balance or `None` if the timeout expired
+        """
+        def ready():
+            snapshot = self.snapshot
+            return snapshot.synced and asset in snapshot.balances and predicate(snapshot.balances[asset])
+
+        with self._condition:
+            if self._condition.wait_for(ready, timeout):
+                return self.snapshot.balances[asset]
+            return None
+
+    def _publish(self, balances=None, synced=None, update_time=None):
+        snapshot = self.snapshot
+        self.snapshot = BalanceSnapshot(
+            snapshot.balances if balances is None else MappingProxyType(balances),
+            snapshot.synced if synced is None else synced,
+            snapshot.update_time if update_time is None else update_time,
+            snapshot.version + 1,
+        )
+        self._condition.notify_all()
+
+    def load(self, balances, update_time):
+        """
+        Replace the whole book with a full account snapshot
+        """
+        with self._condition:
+            self._publish(dict(balances), True, update_time)
+
+    def invalidate(self):
+        with self._condition:
+            self._publish(synced=False)
+
+    def apply_position(self, balances, update_time):
+        """
+        Apply the absolute balances of an `outboundAccountPosition` event
+        """
+        with self._condition:
+            snapshot = self.snapshot
+
+            if not snapshot.synced or update_time < snapshot.update_time:
+                return False
+
+            self._publish({**snapshot.balances, **balances}, update_time=update_time)
+            return True
+
+    def apply_delta(self, asset, delta, clear_time):
+        """
+        Apply the balance change of a `balanceUpdate` event, unless the book
+        already includes it
+        """
+        with self._condition:
+            snapshot = self.snapshot
+
+            if not snapshot.synced or clear_time <= snapshot.update_time:
+                return False
+
+            if asset not in snapshot.balances:
+                # Every asset is part of the snapshot, an unknown one means we missed something
+                logger.debug(f"Balance update for unknown asset {term.yellow_bold(asset)}, resyncing")
+                self._publish(synced=False)
+                return False
+
+            self._publish({**snapshot.balances, asset: snapshot.balances[asset] + delta}, update_time=clear_time)
+            return True
@@ -6,22 +6,27 @@ import threading
 
 from contextlib import contextmanager
 
+from trader.binance.balance_book import BalanceBook
+from trader.binance.order_store import BinanceOrderStore
+from trader.binance.ticker_book import TickerBook
+
 
 class BinanceCache:
-    ticker_values = {}
-    non_existent_tickers = set()
-    orders = {}
+    """
+    State received from Binance, owned by a single manager so that several
+    managers can live in the same process.
 
-    _balances = {}
-    _balances_mutex = threading.Lock()
+    Tickers and balances are published as immutable snapshots: readers
+    never take a lock, writers replace the current version atomically.
+    """
 
-    _starting_balances = {}
-    _starting_balances_mutex = threading.Lock()
+    def __init__(self):
+        self.tickers = TickerBook()
+        self.balances = BalanceBook()
+        self.orders = BinanceOrderStore()
 
-    @contextmanager
-    def open_balances(self):
-        with self._balances_mutex:
-            yield self._balances
+        self._starting_balances = {}
+        self._starting_balances_mutex = threading.Lock()
 
     @contextmanager
     def starting_balances(self):
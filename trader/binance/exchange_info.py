@@ -0,0 +1,114 @@
+"""
+Binance exchange information
+"""
+
+import os
+import json
+import time
+import threading
+
+from trader.logger import logger
+
+EXCHANGE_INFO_PATH = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.realpath(__file__)), '../../.data/exchange_info.json')
+)
+EXCHANGE_INFO_TTL = 43200
+
+
+class BinanceExchangeInfo:
+    """
+    Snapshot of the symbol filters of every market, loaded in bulk with a
+    single REST call and persisted to disk until it expires.
+
+    Filters are indexed by symbol and filter type. A `path` of `None` keeps
+    them in memory only.
+    """
+
+    def __init__(self, client, path=EXCHANGE_INFO_PATH, ttl=EXCHANGE_INFO_TTL):
+        self.client = client
+        self.path = path
+        self.ttl = ttl
+
+        self.filters = {}
+        self.timestamp = 0.0
+        self._mutex = threading.Lock()
+
+    def _is_fresh(self):
+        return time.time() - self.timestamp < self.ttl
+
+    def _load_from_disk(self):
+        if self.path is None:
+            return
+
+        try:
+            with open(self.path, "r") as file:
+                snapshot = json.load(file)
+        except (OSError, ValueError):
+            return
+
+        self.filters = snapshot["filters"]
+        self.timestamp = snapshot["timestamp"]
+
+    def _save_to_disk(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+
+        with open(temp_path, "w") as file:
+            json.dump({"timestamp": self.timestamp, "filters": self.filters}, file)
+
+        os.replace(temp_path, self.path)
+
+    def refresh(self):
+        """
+        Download the exchange information for all the symbols at once
+        """
+        with self._mutex:
+            self._refresh()
+
+    def _refresh(self):
+        exchange_info = self.client.get_exchange_info()
+
+        self.filters = {
+            symbol["symbol"]: {_filter["filterType"]: _filter for _filter in symbol["filters"]}
+            for symbol in exchange_info["symbols"]
+        }
+        self.timestamp = time.time()
+        logger.debug(f"Exchange information fetched for {len(self.filters)} symbols")
+
+        if self.path is None:
+            return
+
+        try:
+            self._save_to_disk()
+        except OSError as e:
+            logger.warning(f"Failed to save exchange information: {e}")
+
+    def _ensure_fresh(self):
+        if self._is_fresh():
+            return
+
+        with self._mutex:
+            if self._is_fresh():
+                return
+
+            self._load_from_disk()
+
+            if not self._is_fresh():
+                self._refresh()
+
+    def has_symbol(self, symbol):
+        self._ensure_fresh()
+        return symbol in self.filters
+
+    def get_filter(self, symbol, filter_type):
+        self._ensure_fresh()
+        return self.filters.get(symbol, {}).get(filter_type, None)
+
+    def lot_size(self, symbol):
+        return self.get_filter(symbol, "LOT_SIZE")
+
+    def price_filter(self, symbol):
+        return self.get_filter(symbol, "PRICE_FILTER")
+
+    def min_notional(self, symbol):
+        return self.get_filter(symbol, "MIN_NOTIONAL")
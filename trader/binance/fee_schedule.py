@@ -0,0 +1,113 @@
+"""
+Binance fee schedule
+"""
+
+import threading
+
+from trader.logger import logger
+from trader.models import Coin
+
+BNB_COIN = "BNB"
+BNB_FEE_DISCOUNT = 0.75
+
+
+class BinanceFeeSchedule:
+    """
+    Trade commissions of every symbol, loaded in bulk and refreshed on a timer.
+
+    The BNB burn eligibility is re-evaluated once per scout tick by `update`,
+    which precomputes the effective fee of every coin for both sides.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.base_fees = {}
+        self.effective_fees = {}
+        self._mutex = threading.Lock()
+
+    def refresh(self):
+        """
+        Download the commissions of every symbol at once
+        """
+        base_fees = {
+            ticker["symbol"]: float(ticker["takerCommission"])
+            for ticker in self.manager.client.get_trade_fee()
+        }
+
+        with self._mutex:
+            self.base_fees = base_fees
+
+        logger.debug(f"Trade fees fetched for {len(base_fees)} symbols")
+
+    def get_base_fee(self, symbol):
+        if not self.base_fees:
+            self.refresh()
+        return self.base_fees.get(symbol, None)
+
+    def _effective_fee(self, origin_coin, target_coin, selling, using_bnb, bnb_balance):
+        symbol = origin_coin + target_coin
+        base_fee = self.get_base_fee(symbol)
+
+        # Coins are not necessarily traded against every other coin
+        if base_fee is None or not self.manager.exchange_info.has_symbol(symbol):
+            return None
+
+        if not using_bnb:
+            return base_fee
+
+        # The discount is only applied if we have enough BNB to cover the fee
+        amount_trading = (
+            self.manager._sell_quantity(origin_coin.symbol, target_coin.symbol)
+            if selling
+            else self.manager._buy_quantity(origin_coin.symbol, target_coin.symbol)
+        )
+
+        fee_amount = amount_trading * base_fee * BNB_FEE_DISCOUNT
+
+        if origin_coin.symbol == BNB_COIN:
+            fee_amount_bnb = fee_amount
+        else:
+            origin_price = self.manager.get_ticker_price(origin_coin + Coin(BNB_COIN))
+
+            if origin_price is None:
+                return base_fee
+
+            fee_amount_bnb = fee_amount * origin_price
+
+        if bnb_balance >= fee_amount_bnb:
+            return base_fee * BNB_FEE_DISCOUNT
+        return base_fee
+
+    def update(self, coins, target_coin):
+        """
+        Re-evaluate the BNB discount and precompute the effective fee of
+        trading every coin against the target coin, coins without a market
+        against the target coin are left out
+        """
+        using_bnb = self.manager.get_using_bnb_for_fees()
+        bnb_balance = self.manager.get_currency_balance(BNB_COIN) if using_bnb else 0.0
+
+        effective_fees = {}
+
+        for coin in coins:
+            for selling in (True, False):
+                fee = self._effective_fee(coin, target_coin, selling, using_bnb, bnb_balance)
+
+                if fee is not None:
+                    effective_fees[(coin + target_coin, selling)] = fee
+
+        self.effective_fees = effective_fees
+
+    def get_fee(self, origin_coin, target_coin, selling):
+        """
+        Get the fee of trading the origin coin against the target coin, `None`
+        if there is no such market
+        """
+        fee = self.effective_fees.get((origin_coin + target_coin, selling), None)
+
+        if fee is not None:
+            return fee
+
+        using_bnb = self.manager.get_using_bnb_for_fees()
+        bnb_balance = self.manager.get_currency_balance(BNB_COIN) if using_bnb else 0.0
+        return self._effective_fee(origin_coin, target_coin, selling, using_bnb, bnb_balance)
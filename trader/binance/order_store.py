@@ -0,0 +1,99 @@
+"""
+Binance order store
+"""
+
+import threading
+
+from collections import OrderedDict
+
+from trader.metrics import metrics
+
+ORDER_STORE_CAPACITY = 1000
+
+TERMINAL_STATUSES = frozenset(("FILLED", "CANCELED", "REJECTED", "EXPIRED"))
+
+
+class BinanceOrderStore:
+    """
+    Latest known state of every order.
+
+    Threads waiting on an order are woken up as soon as the stream
+    manager stores a new state for it.
+
+    Orders in a terminal state are evicted as soon as the last thread
+    waiting on them has seen that state. Terminal orders nobody waited on
+    are kept, oldest first evicted, as long as the store holds no more
+    than `capacity` orders. Evictions are counted in `orders.evicted`.
+    """
+
+    def __init__(self, capacity=ORDER_STORE_CAPACITY):
+        self.capacity = capacity
+        self.evicted = metrics.counter("orders.evicted")
+
+        self._orders = OrderedDict()
+        self._waiters = {}
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        return len(self._orders)
+
+    def get(self, order_id, default=None):
+        return self._orders.get(order_id, default)
+
+    def update(self, order):
+        with self._condition:
+            previous = self._orders.get(order.id, None)
+
+            # Reports may arrive out of order, never bring a finished order back to life
+            if previous is not None and previous.status in TERMINAL_STATUSES and order.status not in TERMINAL_STATUSES:
+                return
+
+            self._orders[order.id] = order
+            self._orders.move_to_end(order.id)
+            self._evict_overflow()
+            self._condition.notify_all()
+
+    def wait(self, order_id, predicate=None, timeout=None):
+        """
+        Block until the order exists and matches the predicate, or until the
+        timeout expires, then return its latest state (`None` if unknown)
+        """
+        def ready():
+            order = self._orders.get(order_id, None)
+            return order is not None and (predicate is None or predicate(order))
+
+        with self._condition:
+            self._waiters[order_id] = self._waiters.get(order_id, 0) + 1
+
+            try:
+                self._condition.wait_for(ready, timeout)
+                return self._orders.get(order_id, None)
+            finally:
+                self._release(order_id)
+
+    def _release(self, order_id):
+        waiters = self._waiters.pop(order_id) - 1
+
+        if waiters:
+            self._waiters[order_id] = waiters
+            return
+
+        order = self._orders.get(order_id, None)
+
+        if order is not None and order.status in TERMINAL_STATUSES:
+            del self._orders[order_id]
+            self.evicted.increment()
+
+    def _evict_overflow(self):
+        if len(self._orders) <= self.capacity:
+            return
+
+        # Orders still open or being waited on are never evicted
+        evictable = [
+            order_id for order_id, order in self._orders.items()
+            if order.status in TERMINAL_STATUSES and order_id not in self._waiters
+        ]
+
+        for order_id in evictable[:len(self._orders) - self.capacity]:
+            del self._orders[order_id]
+            self.evicted.increment()
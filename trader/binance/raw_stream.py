@@ -0,0 +1,69 @@
+"""
+Raw Binance stream payloads
+"""
+
+try:
+    from orjson import loads
+except ImportError:
+    from json import loads
+
+
+def decode(raw):
+    """
+    Decode a raw stream message, unwrapping the payload of combined streams
+    """
+    message = loads(raw)
+
+    if isinstance(message, dict) and "stream" in message and "data" in message:
+        return message["data"]
+    return message
+
+
+def ticker_events(data):
+    """
+    Get the mini ticker events of a decoded payload, the all-market stream
+    sends arrays while symbol streams send single tickers
+    """
+    if isinstance(data, list):
+        return data
+    return (data,) if data.get("e") == "24hrMiniTicker" else ()
+
+
+def to_user_data_event(data):
+    """
+    Convert a raw user data event to the fields names used by UnicornFy
+    """
+    event_type = data["e"]
+
+    if event_type == "executionReport":
+        return {
+            "event_type": event_type,
+            "event_time": data["E"],
+            "symbol": data["s"],
+            "side": data["S"],
+            "order_type": data["o"],
+            "order_id": data["i"],
+            "cumulative_quote_asset_transacted_quantity": data["Z"],
+            "current_order_status": data["X"],
+            "order_price": data["p"],
+            "transaction_time": data["T"],
+        }
+
+    if event_type == "balanceUpdate":
+        return {
+            "event_type": event_type,
+            "event_time": data["E"],
+            "asset": data["a"],
+            "balance_delta": data["d"],
+            "clear_time": data["T"],
+        }
+
+    if event_type == "outboundAccountPosition":
+        return {
+            "event_type": event_type,
+            "event_time": data["E"],
+            "last_update_time": data["u"],
+            "balances": [{"asset": bal["a"], "free": bal["f"], "locked": bal["l"]} for bal in data["B"]],
+        }
+
+    return {"event_type": event_type, **data}
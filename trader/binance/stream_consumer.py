@@ -0,0 +1,94 @@
+"""
+Binance stream consumer
+"""
+
+import time
+import queue
+import threading
+
+from trader.logger import logger
+from trader.metrics import metrics
+
+_STOP = object()
+
+# Maximum number of messages handed over at once to a batch handler
+MAX_BATCH_SIZE = 1000
+
+
+class StreamConsumer:
+    """
+    Hand the messages received on the websocket threads over to a dedicated
+    thread, which blocks until a message is available instead of polling.
+
+    In batch mode, the handler receives every message queued at the time
+    it wakes up, so that it can skip the superseded ones.
+
+    The time spent by messages in the queue and the queue depth are recorded
+    in the `stream.<name>.lag` and `stream.<name>.queue_depth` metrics.
+    """
+
+    def __init__(self, handler, name, batch=False):
+        self.handler = handler
+        self.name = name
+        self.batch = batch
+
+        self.lag = metrics.histogram(f"stream.{name}.lag")
+        self.queue_depth = metrics.histogram(f"stream.{name}.queue_depth")
+
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name=f"stream-{name}", daemon=True)
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def start(self):
+        self._thread.start()
+
+    def put(self, data):
+        self._queue.put((time.monotonic(), data))
+
+    def stop(self):
+        self._queue.put((time.monotonic(), _STOP))
+
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _take(self):
+        items = [self._queue.get()]
+
+        if self.batch:
+            try:
+                while len(items) < MAX_BATCH_SIZE:
+                    items.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+        self.queue_depth.observe(len(items) + self._queue.qsize())
+        return items
+
+    def _run(self):
+        while True:
+            items = self._take()
+            now = time.monotonic()
+            stopping = False
+            batch = []
+
+            for received, data in items:
+                if data is _STOP:
+                    stopping = True
+                    break
+
+                self.lag.observe(now - received)
+                batch.append(data)
+
+            try:
+                if self.batch and batch:
+                    self.handler(batch)
+                else:
+                    for data in batch:
+                        self.handler(data)
+            except Exception as e:  # pylint: disable=broad-except
+                logger.exception(e)
+
+            if stopping:
+                return
@@ -2,35 +2,71 @@
 Binance stream manager
 """
 
-import sys
 import time
 import threading
 
+import numpy as np
+
 from binance.exceptions import BinanceAPIException, BinanceRequestException
 from unicorn_binance_websocket_api import BinanceWebSocketApiManager
 
 from trader.logger import logger, term, pretty
+from trader.metrics import metrics
 from trader.binance.order import BinanceOrder
+from trader.binance import raw_stream
 from trader.binance.order_guard import BinanceOrderGuard
+from trader.binance.stream_consumer import StreamConsumer
+from trader.binance.stream_monitor import StreamMonitor
+from trader.binance.stream_recorder import USER_DATA, MARKET_DATA, StreamRecorder, read_records
+
+MINI_TICKER_EVENT = "24hrMiniTicker"
+
+# Names of the symbol, close price and event time fields of a mini ticker
+RAW_TICKER_FIELDS = ("s", "c", "E")
+UNICORNFY_TICKER_FIELDS = ("symbol", "close_price", "event_time")
 
 
 class BinanceStreamManager:
 
-    def __init__(self, cache, config, client):
+    def __init__(self, cache, config, client, ticker_listeners=None, ticker_markets=None,
+                 websocket_manager_class=BinanceWebSocketApiManager):
         self.cache = cache
         self.logger = logger
-        self.bsm = BinanceWebSocketApiManager(
-            output_default="UnicornFy",
+        self.raw_output = config.STREAM_OUTPUT == "raw"
+        self._ticker_fields = RAW_TICKER_FIELDS if self.raw_output else UNICORNFY_TICKER_FIELDS
+
+        # User data is handled on its own thread so that it never waits behind market data
+        self._user_data_consumer = StreamConsumer(self._process_user_data, USER_DATA)
+        self._market_data_consumer = StreamConsumer(self._process_market_data, MARKET_DATA, batch=True)
+        self._signal_consumer = StreamConsumer(self._process_stream_signal, "signals")
+
+        # Silence is expected on the user data stream when not trading, only market data can stall
+        self.monitor = StreamMonitor(self._resync, config.STREAM_MAX_LAG)
+        self.monitor.add_lane(USER_DATA)
+        self.monitor.add_lane(MARKET_DATA, config.STREAM_STALL_TIMEOUT)
+
+        self.recorder = StreamRecorder(config.STREAM_RECORD_PATH) if config.STREAM_RECORD_PATH else None
+        self.bsm = websocket_manager_class(
+            output_default="raw_data" if self.raw_output else "UnicornFy",
             enable_stream_signal_buffer=True,
             exchange=f"binance.{config.BINANCE_TLD}",
+            process_stream_data=self._receive_stream_data,
+            process_stream_signals=self._receive_stream_signal,
         )
 
-        self.bsm.create_stream(
-            ["arr"],
-            ["!miniTicker"],
-            api_key=config.BINANCE_API_KEY,
-            api_secret=config.BINANCE_API_SECRET,
-        )
+        self.config = config
+        self.ticker_stream_id = None
+        self.ticker_markets = set()
+
+        if config.TICKER_STREAM == "all":
+            self.ticker_stream_id = self.bsm.create_stream(
+                ["arr"],
+                ["!miniTicker"],
+                api_key=config.BINANCE_API_KEY,
+                api_secret=config.BINANCE_API_SECRET,
+            )
+        else:
+            self.set_ticker_markets(ticker_markets or ())
 
         self.bsm.create_stream(
             ["arr"],
@@ -42,8 +78,43 @@ class BinanceStreamManager:
         self.client = client
         self.pending_orders = set()
         self.pending_orders_mutex = threading.Lock()
-        self._processorThread = threading.Thread(target=self._stream_processor)
-        self._processorThread.start()
+        self.ticker_listeners = ticker_listeners if ticker_listeners is not None else []
+        self._superseded_tickers = metrics.counter("stream.market_data.superseded")
+        self._user_data_consumer.start()
+        self._market_data_consumer.start()
+        self._signal_consumer.start()
+        self.monitor.start()
+
+    def set_ticker_markets(self, symbols):
+        """
+        Subscribe to the mini ticker of the given symbols only, unsubscribing
+        from the ones no longer needed
+        """
+        if self.config.TICKER_STREAM == "all":
+            return
+
+        markets = {symbol.lower() for symbol in symbols}
+
+        if self.ticker_stream_id is None:
+            if markets:
+                self.ticker_stream_id = self.bsm.create_stream(
+                    ["miniTicker"],
+                    list(markets),
+                    api_key=self.config.BINANCE_API_KEY,
+                    api_secret=self.config.BINANCE_API_SECRET,
+                )
+        else:
+            added = markets - self.ticker_markets
+            removed = self.ticker_markets - markets
+
+            if added:
+                self.bsm.subscribe_to_stream(self.ticker_stream_id, channels=["miniTicker"], markets=list(added))
+
+            if removed:
+                self.bsm.unsubscribe_from_stream(self.ticker_stream_id, markets=list(removed))
+
+        logger.debug(f"Subscribed to {len(markets)} tickers")
+        self.ticker_markets = markets
 
     def acquire_order_guard(self):
         return BinanceOrderGuard(self.pending_orders, self.pending_orders_mutex)
@@ -76,68 +147,185 @@ class BinanceStreamManager:
             }
 
             logger.debug(f"Pending order <{order_id}> for {term.yellow_bold(symbol)}:\n{pretty(fake_report)}")
-            self.cache.orders[fake_report["order_id"]] = BinanceOrder(fake_report)
+            self.cache.orders.update(BinanceOrder(fake_report))
 
     def _invalidate_balances(self):
-        with self.cache.open_balances() as balances:
-            balances.clear()
+        self.cache.balances.invalidate()
+
+    def _resync(self, lane):
+        """
+        Fetch the state a lane is responsible for from the REST API
+        """
+        if lane == MARKET_DATA:
+            if self.config.TICKER_STREAM == "all":
+                self.cache.tickers.refresh(self.client)
+            elif self.ticker_markets:
+                self.cache.tickers.refresh(self.client, {market.upper() for market in self.ticker_markets})
+        else:
+            self._invalidate_balances()
+            self._fetch_pending_orders()
+
+    def _receive_stream_data(self, stream_data, stream_buffer_name=False):
+        """
+        Called on the websocket threads for every message received
+        """
+        market_data = self._is_market_data(stream_data)
+
+        if self.recorder is not None:
+            self.recorder.record(MARKET_DATA if market_data else USER_DATA, stream_data)
+
+        if market_data:
+            self._market_data_consumer.put(stream_data)
+        else:
+            self._user_data_consumer.put(stream_data)
+
+    def _is_market_data(self, stream_data):
+        if self.raw_output:
+            return MINI_TICKER_EVENT in stream_data
+        return stream_data.get("event_type", None) == MINI_TICKER_EVENT
+
+    def _receive_stream_signal(self, signal_type=None, stream_id=None, **kwargs):
+        """
+        Called on the websocket threads for every connection and disconnection
+        """
+        self._signal_consumer.put({"type": signal_type, "stream_id": stream_id})
+
+    def _process_stream_signal(self, stream_signal):
+        signal_type = stream_signal["type"]
+        stream_id = stream_signal["stream_id"]
 
-    def _stream_processor(self):
-        while True:
-            if self.bsm.is_manager_stopping():
-                sys.exit()
+        if signal_type == "CONNECT":
+            stream_info = self.bsm.get_stream_info(stream_id)
 
-            stream_signal = self.bsm.pop_stream_signal_from_stream_signal_buffer()
-            stream_data = self.bsm.pop_stream_data_from_stream_buffer()
+            if "!userData" in stream_info["markets"]:
+                logger.debug(f"Received {signal_type} signal for UserData")
+                self._fetch_pending_orders()
+                self._invalidate_balances()
 
-            if stream_signal is not False:
-                signal_type = stream_signal["type"]
-                stream_id = stream_signal["stream_id"]
+    def _process_user_data(self, stream_data):
+        if self.raw_output:
+            data = raw_stream.decode(stream_data)
 
-                if signal_type == "CONNECT":
-                    stream_info = self.bsm.get_stream_info(stream_id)
+            if "e" not in data:
+                return
 
-                    if "!userData" in stream_info["markets"]:
-                        logger.debug(f"Received {signal_type} signal for UserData")
-                        self._fetch_pending_orders()
-                        self._invalidate_balances()
+            stream_data = raw_stream.to_user_data_event(data)
+        elif "event_type" not in stream_data:
+            # Subscription acknowledgements ({"result": None, "id": ...}) carry no event
+            return
 
-            if stream_data is not False:
-                self._process_stream_data(stream_data)
+        self.monitor.observe(USER_DATA, stream_data.get("event_time", None))
+        self._process_stream_data(stream_data)
 
-            if stream_data is False and stream_signal is False:
-                time.sleep(0.01)
+    def _market_events(self, stream_data):
+        """
+        Get the mini ticker events of a market data message, in either output
+        """
+        if self.raw_output:
+            return raw_stream.ticker_events(raw_stream.decode(stream_data))
+
+        return stream_data.get("data", (stream_data,))
+
+    def _process_market_data(self, batch):
+        symbol_field, price_field, time_field = self._ticker_fields
+        intern = self.cache.tickers.symbols.intern
+        symbol_ids = []
+        prices = []
+        last_events = ()
+
+        # Oldest first, so that the most recent price of every symbol wins when falling behind
+        for stream_data in batch:
+            events = self._market_events(stream_data)
+
+            if events:
+                symbol_ids.extend([intern(event[symbol_field]) for event in events])
+                prices.extend([event[price_field] for event in events])
+                last_events = events
+
+        event_time = max(event[time_field] for event in last_events) if last_events else None
+        self.monitor.observe(MARKET_DATA, event_time)
+
+        if not symbol_ids:
+            return
+
+        symbol_ids = np.array(symbol_ids, dtype=np.intp)
+        self._superseded_tickers.increment(len(symbol_ids) - len(np.unique(symbol_ids)))
+        changed = self.cache.tickers.update_ids(symbol_ids, np.array(prices, dtype=np.float64))
+
+        if changed:
+            for listener in self.ticker_listeners:
+                listener(changed)
 
     def _process_stream_data(self, stream_data):
         event_type = stream_data["event_type"]
 
         if event_type == "executionReport":  # !userData
             logger.debug(f"Execution report:\n{pretty(stream_data)}")
-            order = BinanceOrder(stream_data)
-            self.cache.orders[order.id] = order
+            self.cache.orders.update(BinanceOrder(stream_data))
 
         elif event_type == "balanceUpdate":  # !userData
             logger.debug(f"Balance update:\n{pretty(stream_data)}")
-
-            with self.cache.open_balances() as balances:
-                asset = stream_data["asset"]
-
-                if asset in balances:
-                    del balances[stream_data["asset"]]
+            self.cache.balances.apply_delta(
+                stream_data["asset"],
+                float(stream_data["balance_delta"]),
+                stream_data.get("clear_time", stream_data["event_time"]),
+            )
 
         elif event_type in ("outboundAccountPosition", "outboundAccountInfo"):  # !userData
             logger.debug(f"{event_type}:\n{pretty(stream_data)}")
+            self.cache.balances.apply_position(
+                {bal["asset"]: float(bal["free"]) for bal in stream_data["balances"]},
+                stream_data.get("last_update_time", stream_data["event_time"]),
+            )
 
-            with self.cache.open_balances() as balances:
-                for bal in stream_data["balances"]:
-                    balances[bal["asset"]] = float(bal["free"])
-
-        elif event_type == "24hrMiniTicker":
-            for event in stream_data["data"]:
-                self.cache.ticker_values[event["symbol"]] = float(event["close_price"])
+        elif event_type == MINI_TICKER_EVENT:
+            self._process_market_data([stream_data])
 
         else:
             logger.error(f"Unknown event type: {event_type}\n{pretty(stream_data)}")
 
+    def replay(self, path, realtime=False):
+        """
+        Feed the messages of a stream recording through the processing
+        handlers, either at the pace they were received or as fast as possible
+        """
+        replay_started = time.monotonic()
+        record_started = None
+        received = None
+
+        def clock():
+            # Lag is measured against the time the messages were originally received
+            return received
+
+        live_clock, self.monitor.clock = self.monitor.clock, clock
+
+        try:
+            for received, lane, stream_data in read_records(path):
+                if isinstance(stream_data, str) != self.raw_output:
+                    raise ValueError(f"Stream recording {path} does not match the {self.config.STREAM_OUTPUT} output")
+
+                if record_started is None:
+                    record_started = received
+
+                if realtime:
+                    delay = (received - record_started) - (time.monotonic() - replay_started)
+
+                    if delay > 0:
+                        time.sleep(delay)
+
+                if lane == MARKET_DATA:
+                    self._process_market_data([stream_data])
+                else:
+                    self._process_user_data(stream_data)
+        finally:
+            self.monitor.clock = live_clock
+
     def close(self):
         self.bsm.stop_manager_with_all_streams()
+        self.monitor.stop()
+        self._user_data_consumer.stop()
+        self._market_data_consumer.stop()
+        self._signal_consumer.stop()
+
+        if self.recorder is not None:
+            self.recorder.close()
@@ -0,0 +1,151 @@
+"""
+Binance stream monitor
+"""
+
+import time
+import threading
+
+from trader.logger import logger, term
+from trader.metrics import metrics
+
+# Seconds between two checks for stalled streams
+CHECK_INTERVAL = 1
+
+# Minimum number of seconds between two resyncs of the same lane
+RESYNC_COOLDOWN = 30
+
+
+class _Lane:
+    def __init__(self, name, stall_timeout):
+        self.name = name
+        self.stall_timeout = stall_timeout
+        self.event_lag = metrics.histogram(f"stream.{name}.event_lag")
+        self.resyncs = metrics.counter(f"stream.{name}.resyncs")
+
+        self.last_received = time.monotonic()
+        self.last_event_time = None
+        self.last_resync = float("-inf")
+        self.lagging = False
+        self.stalled = False
+
+
+class StreamMonitor:
+    """
+    Measure how far behind the exchange every stream lane is, comparing the
+    event time of the messages with the time they are processed at, and
+    request a resync through the REST API when a lane falls behind.
+
+    A lane is resynced when its lag exceeds `max_lag`, and, if it has a
+    stall timeout, when no message was received for that long (silent stall)
+    or when the event times of two consecutive messages are further apart
+    than that (gap, usually after a reconnection).
+
+    The lag distribution is recorded in the `stream.<lane>.event_lag`
+    metric, in seconds. It relies on the local clock being synchronized.
+    """
+
+    def __init__(self, resync, max_lag):
+        self.resync = resync
+        self.max_lag = max_lag
+        self.clock = time.time
+
+        self._lanes = {}
+        self._pending = {}
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="stream-monitor", daemon=True)
+
+    def add_lane(self, name, stall_timeout=0):
+        self._lanes[name] = _Lane(name, stall_timeout)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def observe(self, name, event_time):
+        """
+        Record a message processed on a lane, `event_time` being the time in
+        milliseconds at which the exchange generated it
+        """
+        lane = self._lanes[name]
+        lane.last_received = time.monotonic()
+
+        if lane.stalled:
+            lane.stalled = False
+            logger.info(f"Stream {term.yellow_bold(name)} is receiving messages again")
+
+        if event_time is None:
+            return
+
+        lag = self.clock() - event_time / 1000
+        lane.event_lag.observe(lag)
+
+        previous_event_time, lane.last_event_time = lane.last_event_time, event_time
+
+        if lane.stall_timeout and previous_event_time is not None:
+            gap = (event_time - previous_event_time) / 1000
+
+            if gap > lane.stall_timeout:
+                self._request_resync(lane, f"skipped {gap:.1f} seconds of events")
+
+        if not self.max_lag:
+            return
+
+        if lag > self.max_lag:
+            if not lane.lagging:
+                lane.lagging = True
+                self._request_resync(lane, f"is lagging {lag:.1f} seconds behind")
+        elif lane.lagging:
+            lane.lagging = False
+            logger.info(f"Stream {term.yellow_bold(name)} caught up with the exchange")
+
+    def _request_resync(self, lane, reason):
+        with self._condition:
+            self._pending.setdefault(lane.name, reason)
+            self._condition.notify_all()
+
+    def _check_stalls(self):
+        now = time.monotonic()
+
+        for lane in self._lanes.values():
+            if lane.stall_timeout and not lane.stalled and now - lane.last_received > lane.stall_timeout:
+                lane.stalled = True
+                self._request_resync(lane, f"received nothing for {now - lane.last_received:.1f} seconds")
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._stopping or self._pending, CHECK_INTERVAL)
+
+                if self._stopping:
+                    return
+
+                pending, self._pending = self._pending, {}
+
+            self._check_stalls()
+
+            for name, reason in pending.items():
+                self._resync_lane(self._lanes[name], reason)
+
+    def _resync_lane(self, lane, reason):
+        now = time.monotonic()
+
+        if now - lane.last_resync < RESYNC_COOLDOWN:
+            logger.debug(f"Stream {lane.name} {reason}, already resynced recently")
+            return
+
+        logger.warning(f"Stream {term.yellow_bold(lane.name)} {reason}, resyncing through the REST API")
+        lane.last_resync = now
+        lane.resyncs.increment()
+
+        try:
+            self.resync(lane.name)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.exception(e)
@@ -0,0 +1,96 @@
+"""
+Binance stream recorder
+"""
+
+import time
+import gzip
+import struct
+
+try:
+    from orjson import dumps, loads
+except ImportError:
+    from json import dumps as _dumps, loads
+
+    def dumps(data):
+        return _dumps(data).encode()
+
+from trader.logger import logger
+from trader.binance.stream_consumer import StreamConsumer
+
+USER_DATA = "user_data"
+MARKET_DATA = "market_data"
+LANES = (USER_DATA, MARKET_DATA)
+
+# Receive time, lane, format and length of the payload that follows
+RECORD_HEADER = struct.Struct("<dBBI")
+
+FORMAT_RAW = 0
+FORMAT_UNICORNFY = 1
+
+# Seconds between two flushes of the log, a crash loses at most this much data
+FLUSH_INTERVAL = 5
+
+
+class StreamRecorder:
+    """
+    Append every message received on the websocket streams, along with the
+    time it was received at, to a gzip compressed binary log.
+
+    Raw messages are stored as received, UnicornFy messages are stored as
+    JSON. Messages are written on a dedicated thread so that recording
+    does not slow the websocket threads down.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = gzip.open(path, "ab")
+        self._flushed = time.monotonic()
+        self._consumer = StreamConsumer(self._write, "recorder", batch=True)
+        self._consumer.start()
+
+    def record(self, lane, stream_data):
+        self._consumer.put((time.time(), LANES.index(lane), stream_data))
+
+    def _write(self, records):
+        for received, lane, stream_data in records:
+            if isinstance(stream_data, str):
+                payload, data_format = stream_data.encode(), FORMAT_RAW
+            else:
+                payload, data_format = dumps(stream_data), FORMAT_UNICORNFY
+
+            self._file.write(RECORD_HEADER.pack(received, lane, data_format, len(payload)))
+            self._file.write(payload)
+
+        if time.monotonic() - self._flushed > FLUSH_INTERVAL:
+            self._file.flush()
+            self._flushed = time.monotonic()
+
+    def close(self):
+        self._consumer.stop()
+        self._file.close()
+        logger.debug(f"Stream recording saved to {self.path}")
+
+
+def read_records(path):
+    """
+    Iterate over the (receive time, lane, message) records of a stream log,
+    messages being strings in raw format or dictionaries in UnicornFy format
+    """
+    with gzip.open(path, "rb") as file:
+        while True:
+            try:
+                header = file.read(RECORD_HEADER.size)
+
+                if len(header) < RECORD_HEADER.size:
+                    return
+
+                received, lane, data_format, length = RECORD_HEADER.unpack(header)
+                payload = file.read(length)
+            except EOFError:
+                logger.debug(f"Stream recording {path} is truncated, stopping at the last complete record")
+                return
+
+            if len(payload) < length:
+                return
+
+            yield received, LANES[lane], payload.decode() if data_format == FORMAT_RAW else loads(payload)
@@ -0,0 +1,69 @@
+"""
+Binance symbol table
+"""
+
+import threading
+
+
+class SymbolTable:
+    """
+    Intern ticker symbols to dense integer ids, in order of first use.
+
+    Ids are never reused, so they can index arrays shared between threads.
+    Symbols can also be looked up by base and quote asset, which avoids
+    building the concatenated symbol once it is known.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._symbols = []
+        self._pairs = {}
+        self._mutex = threading.Lock()
+
+    def __len__(self):
+        return len(self._symbols)
+
+    def __iter__(self):
+        return iter(self._symbols)
+
+    def get(self, symbol):
+        return self._ids.get(symbol, None)
+
+    def symbol(self, symbol_id):
+        return self._symbols[symbol_id]
+
+    def intern(self, symbol):
+        symbol_id = self._ids.get(symbol, None)
+
+        if symbol_id is not None:
+            return symbol_id
+
+        with self._mutex:
+            symbol_id = self._ids.get(symbol, None)
+
+            if symbol_id is None:
+                # Readers may resolve an id as soon as they see it
+                symbol_id = len(self._symbols)
+                self._symbols.append(symbol)
+                self._ids[symbol] = symbol_id
+
+        return symbol_id
+
+    def pair_id(self, base, quote):
+        """
+        Intern the symbol trading the base asset against the quote asset
+        """
+        quotes = self._pairs.get(base, None)
+
+        if quotes is not None:
+            symbol_id = quotes.get(quote, None)
+
+            if symbol_id is not None:
+                return symbol_id
+
+        symbol_id = self.intern(base + quote)
+
+        with self._mutex:
+            self._pairs.setdefault(base, {})[quote] = symbol_id
+
+        return symbol_id
@@ -0,0 +1,258 @@
+"""
+Binance ticker book
+"""
+
+import time
+import threading
+
+import numpy as np
+
+from binance.exceptions import BinanceAPIException
+
+from trader.logger import logger, term
+from trader.binance.symbol_table import SymbolTable
+
+# Above this number of symbols, fetching every ticker at once is cheaper
+PARTIAL_REFRESH_LIMIT = 8
+
+INVALID_SYMBOL_ERROR = -1121
+
+
+class _Refresh:
+    def __init__(self, symbols):
+        self.symbols = symbols
+        self.done = threading.Event()
+
+    def covers(self, symbols):
+        return self.symbols is None or (symbols is not None and symbols <= self.symbols)
+
+
+def _frozen(array):
+    array.flags.writeable = False
+    return array
+
+
+class TickerSnapshot:
+    """
+    Immutable version of the ticker book: prices and update times are
+    float64 arrays indexed by symbol id, `NaN` when unknown
+    """
+
+    __slots__ = ("symbols", "prices", "timestamps", "non_existent")
+
+    def __init__(self, symbols, prices, timestamps, non_existent):
+        self.symbols = symbols
+        self.prices = prices
+        self.timestamps = timestamps
+        self.non_existent = non_existent
+
+    def price(self, symbol_id):
+        if symbol_id >= len(self.prices):
+            return None
+
+        price = self.prices[symbol_id]
+        return None if np.isnan(price) else float(price)
+
+    def get(self, symbol):
+        symbol_id = self.symbols.get(symbol)
+        return None if symbol_id is None else self.price(symbol_id)
+
+    def age(self, symbol, now=None):
+        symbol_id = self.symbols.get(symbol)
+
+        if symbol_id is None or symbol_id >= len(self.timestamps) or np.isnan(self.timestamps[symbol_id]):
+            return float("inf")
+        return (now or time.time()) - self.timestamps[symbol_id]
+
+
+class TickerBook:
+    """
+    Latest price and update time of every symbol, in arrays indexed by the
+    ids of `symbols`. Updates publish a new `TickerSnapshot`, and concurrent
+    REST refreshes of the same symbols are coalesced.
+    """
+
+    def __init__(self):
+        self.symbols = SymbolTable()
+        self.snapshot = TickerSnapshot(self.symbols, _frozen(np.empty(0)), _frozen(np.empty(0)), frozenset())
+
+        self._write_mutex = threading.Lock()
+        self._mutex = threading.Lock()
+        self._refresh = None
+
+    @property
+    def prices(self):
+        return self.snapshot.prices
+
+    @property
+    def timestamps(self):
+        return self.snapshot.timestamps
+
+    @property
+    def non_existent(self):
+        return self.snapshot.non_existent
+
+    def get(self, symbol):
+        return self.snapshot.get(symbol)
+
+    def get_id(self, symbol_id):
+        return self.snapshot.price(symbol_id)
+
+    def intern(self, symbol):
+        """
+        Get the id of a symbol, making room for it in the arrays if it is new
+        """
+        symbol_id = self.symbols.intern(symbol)
+
+        if symbol_id >= len(self.snapshot.prices):
+            with self._write_mutex:
+                snapshot = self.snapshot
+
+                if symbol_id >= len(snapshot.prices):
+                    self.snapshot = TickerSnapshot(
+                        self.symbols,
+                        _frozen(self._grow(snapshot.prices)),
+                        _frozen(self._grow(snapshot.timestamps)),
+                        snapshot.non_existent,
+                    )
+
+        return symbol_id
+
+    def _grow(self, array):
+        grown = np.full(len(self.symbols), np.nan)
+        grown[:len(array)] = array
+        return grown
+
+    def update(self, symbol, price, timestamp=None):
+        """
+        Set the price of a symbol, return the previous one
+        """
+        previous = self.get(symbol)
+        self.update_many(((symbol, price),), timestamp)
+        return previous
+
+    def update_many(self, tickers, timestamp=None):
+        """
+        Set the price of several symbols given as (symbol, price) tuples,
+        return the symbols whose price changed
+        """
+        symbol_ids = []
+        values = []
+
+        for symbol, price in tickers:
+            symbol_ids.append(self.symbols.intern(symbol))
+            values.append(price)
+
+        return self.update_ids(np.array(symbol_ids, dtype=np.intp), np.array(values, dtype=np.float64), timestamp)
+
+    def update_ids(self, symbol_ids, values, timestamp=None):
+        """
+        Set the price of several symbols given as arrays of interned ids and
+        prices, the last price of a repeated id wins, return the symbols whose
+        price changed
+        """
+        if not len(symbol_ids):
+            return set()
+
+        timestamp = timestamp or time.time()
+
+        with self._write_mutex:
+            snapshot = self.snapshot
+            prices = self._grow(snapshot.prices)
+            timestamps = self._grow(snapshot.timestamps)
+
+            updated = np.unique(symbol_ids)
+            previous = prices[updated]
+            prices[symbol_ids] = values
+            timestamps[symbol_ids] = timestamp
+            changed = updated[prices[updated] != previous]
+
+            self.snapshot = TickerSnapshot(self.symbols, _frozen(prices), _frozen(timestamps), snapshot.non_existent)
+
+        return {self.symbols.symbol(symbol_id) for symbol_id in changed}
+
+    def mark_non_existent(self, symbol):
+        with self._write_mutex:
+            snapshot = self.snapshot
+            self.snapshot = TickerSnapshot(
+                self.symbols,
+                snapshot.prices,
+                snapshot.timestamps,
+                snapshot.non_existent | {symbol},
+            )
+
+    def age(self, symbol):
+        """
+        Number of seconds since the price of the symbol was last updated
+        """
+        return self.snapshot.age(symbol)
+
+    def is_stale(self, symbol, max_age):
+        return bool(max_age) and self.age(symbol) > max_age
+
+    def stale_symbols(self, symbols, max_age):
+        snapshot = self.snapshot
+        now = time.time()
+
+        return {
+            symbol for symbol in symbols
+            if symbol not in snapshot.non_existent and (
+                snapshot.get(symbol) is None or (max_age and snapshot.age(symbol, now) > max_age)
+            )
+        }
+
+    def refresh(self, client, symbols=None):
+        """
+        Fetch prices from the REST API, either for every symbol or only for
+        the given ones
+        """
+        symbols = None if symbols is None else frozenset(symbols)
+
+        while True:
+            with self._mutex:
+                refresh = self._refresh
+
+                if refresh is None:
+                    refresh = self._refresh = _Refresh(symbols)
+                    break
+
+            refresh.done.wait()
+
+            if refresh.covers(symbols):
+                return
+
+        try:
+            if symbols is None or len(symbols) > PARTIAL_REFRESH_LIMIT:
+                self._fetch_all(client, symbols)
+            else:
+                self._fetch_some(client, symbols)
+        finally:
+            with self._mutex:
+                self._refresh = None
+            refresh.done.set()
+
+    def _fetch_all(self, client, symbols):
+        self.update_many((ticker["symbol"], ticker["price"]) for ticker in client.get_symbol_ticker())
+
+        logger.debug(f"Ticker prices fetched for {len(self.symbols)} symbols")
+
+        for symbol in symbols or ():
+            if self.get(symbol) is None:
+                logger.debug(f"Ticker {term.yellow_bold(symbol)} not found, skipping")
+                self.mark_non_existent(symbol)
+
+    def _fetch_some(self, client, symbols):
+        for symbol in symbols:
+            try:
+                ticker = client.get_symbol_ticker(symbol=symbol)
+            except BinanceAPIException as e:
+                if e.code != INVALID_SYMBOL_ERROR:
+                    raise e
+
+                logger.debug(f"Ticker {term.yellow_bold(symbol)} not found, skipping")
+                self.mark_non_existent(symbol)
+                continue
+
+            self.update(symbol, float(ticker["price"]))
+
+        logger.debug(f"Ticker prices fetched for {', '.join(sorted(symbols))}")
@@ -32,6 +32,16 @@ class Config:
             "buy_timeout": 0,
             "scout_margin": 0.8,
             "use_margin": "no",
+            "scout_mode": "interval",
+            "scout_debounce": 0.05,
+            "scout_min_interval": 1,
+            "max_price_age": 60,
+            "ticker_stream": "symbols",
+            "stream_output": "unicornfy",
+            "stream_max_lag": 5,
+            "stream_stall_timeout": 30,
+            "stream_record_path": "",
+            "fake_exchange": "no",
         }
 
         if os.path.exists(TRADER_CONFIG_FILE_PATH):
@@ -71,6 +81,10 @@ class Config:
         # Scouting config
         self.SCOUT_MULTIPLIER = float(get_option("SCOUT_MULTIPLIER"))
         self.SCOUT_SLEEP_TIME = int(get_option("SCOUT_SLEEP_TIME"))
+        self.SCOUT_MODE = get_option("SCOUT_MODE")
+        self.SCOUT_DEBOUNCE = float(get_option("SCOUT_DEBOUNCE"))
+        self.SCOUT_MIN_INTERVAL = float(get_option("SCOUT_MIN_INTERVAL"))
+        self.MAX_PRICE_AGE = float(get_option("MAX_PRICE_AGE"))
 
         # Binance config
         self.BINANCE_API_KEY = get_option("BINANCE_API_KEY")
@@ -79,6 +93,16 @@ class Config:
         self.BINANCE_RETRIES = int(get_option("BINANCE_RETRIES"))
         self.BINANCE_RETRIES_UNLIMITED = not self.BINANCE_RETRIES
 
+        # Websocket streams
+        self.TICKER_STREAM = get_option("TICKER_STREAM")
+        self.STREAM_OUTPUT = get_option("STREAM_OUTPUT")
+        self.STREAM_MAX_LAG = float(get_option("STREAM_MAX_LAG"))
+        self.STREAM_STALL_TIMEOUT = float(get_option("STREAM_STALL_TIMEOUT"))
+        self.STREAM_RECORD_PATH = get_option("STREAM_RECORD_PATH")
+
+        # Trade against an in-process fake exchange instead of Binance
+        self.FAKE_EXCHANGE = get_option("FAKE_EXCHANGE")
+
         # Selected strategy
         self.STRATEGY = get_option("STRATEGY")
 
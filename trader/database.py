@@ -4,32 +4,83 @@ Database engine
 
 import os
 import time
+import threading
 
 from contextlib import contextmanager
 from datetime import datetime, timedelta
 from socketio import Client as SocketIOClient
 from socketio.exceptions import ConnectionError as SocketIOConnectionError
-from sqlalchemy import create_engine, func
+from sqlalchemy import create_engine, event, func, insert, select, update
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import Session, scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from trader import Config
 from trader.logger import logger
+from trader.migrations import migrate
 from trader.models import *
+from trader.pair_table import PairTable
+from trader.scout_history_buffer import ScoutHistoryBuffer
 
 DATABASE_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../.data/trader.sqlite'))
 DATABASE_URI = f"sqlite:///{DATABASE_PATH}"
 
+# Memory-mapped I/O size in bytes and page cache size in KiB (negative values are in KiB for SQLite)
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+SQLITE_CACHE_SIZE = -64 * 1024
+
+SQLITE_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("mmap_size", SQLITE_MMAP_SIZE),
+    ("cache_size", SQLITE_CACHE_SIZE),
+)
+
+
+def create_sqlite_engine(uri):
+    """
+    Create an engine keeping long-lived connections to a SQLite database,
+    each tuned on connect for concurrent readers and a single writer
+    """
+    if make_url(uri).database in (None, "", ":memory:"):
+        # In-memory databases only live as long as their single connection
+        engine = create_engine(uri)
+    else:
+        engine = create_engine(uri, poolclass=QueuePool, connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+
+        for name, value in SQLITE_PRAGMAS:
+            cursor.execute(f"PRAGMA {name}={value}")
+
+        cursor.close()
+
+    return engine
+
 
 class Database:
-    def __init__(self, config, uri=DATABASE_URI):
+    def __init__(self, config, uri=DATABASE_URI, writer=False):
         self.logger = logger
         self.config = config
 
+        # Only the writer process sets the current coin, it never needs to check for changes
+        self.writer = writer
+
         os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
 
-        self.engine = create_engine(uri)
+        self.engine = create_sqlite_engine(uri)
         self.SessionMaker = sessionmaker(bind=self.engine)
+        self.Session = scoped_session(self.SessionMaker)
+        self._session_depth = threading.local()
         self.socketio_client = SocketIOClient()
+        self.scout_history = ScoutHistoryBuffer(self)
+        self.pair_table = PairTable(self)
+        self.coins_listeners = []
+
+        # Current coin along with the id of the history entry it was read from
+        self._current_coin = (0, None)
 
     def socketio_connect(self):
         if self.socketio_client.connected and self.socketio_client.namespaces:
@@ -47,43 +98,82 @@ class Database:
     @contextmanager
     def db_session(self):
         """
-        Creates a context with an open SQLAlchemy session
+        Creates a context with the SQLAlchemy session of the current thread,
+        nested contexts share the session and only the outermost one commits
         """
-        session = scoped_session(self.SessionMaker)
-        yield session
-        session.commit()
-        session.close()
+        session = self.Session()
+        depth = getattr(self._session_depth, "value", 0)
+        self._session_depth.value = depth + 1
+
+        try:
+            yield session
+
+            if not depth:
+                session.commit()
+        except BaseException:
+            if not depth:
+                session.rollback()
+            raise
+        finally:
+            self._session_depth.value = depth
+
+            if not depth:
+                # Detach the objects and return the connection to the pool, the session is reused
+                session.close()
+
+    def add_coins_listener(self, listener):
+        """
+        Register a callable to be notified with the enabled coin symbols
+        every time they are set
+        """
+        self.coins_listeners.append(listener)
 
     def set_coins(self, symbols):
         # Add coins to the database and set them as enabled or not
-        with self.db_session() as session:
-            # For all the coins in the database, if the symbol no longer appears
-            # in the config file, set the coin as disabled
-            coins = session.query(Coin).all()
+        symbols = list(dict.fromkeys(symbols))
+        coin_table = Coin.__table__
+        pair_table = Pair.__table__
 
-            for coin in filter(lambda c: c.symbol not in symbols, coins):
-                coin.enabled = False
+        with self.db_session() as session:
+            # For all the coins in the database, enable them only if their
+            # symbol still appears in the config file
+            session.execute(update(coin_table).where(coin_table.c.symbol.notin_(symbols)).values(enabled=False))
+            session.execute(update(coin_table).where(coin_table.c.symbol.in_(symbols)).values(enabled=True))
 
             # For all the symbols in the config file, add them to the database
             # if they don't exist
-            for symbol in symbols:
-                coin = next((coin for coin in coins if coin.symbol == symbol), None)
-
-                if coin is None:
-                    session.add(Coin(symbol))
-                else:
-                    coin.enabled = True
-
-        # For all the combinations of coins in the database, add a pair to the database
-        with self.db_session() as session:
-            coins = session.query(Coin).filter(Coin.enabled).all()
-
-            for from_coin in coins:
-                for to_coin in filter(lambda c: c != from_coin, coins):
-                    pair = session.query(Pair).filter(Pair.from_coin == from_coin, Pair.to_coin == to_coin).first()
-
-                    if pair is None:
-                        session.add(Pair(from_coin, to_coin))
+            existing_symbols = {symbol for symbol, in session.execute(select([coin_table.c.symbol]))}
+            missing_symbols = [symbol for symbol in symbols if symbol not in existing_symbols]
+
+            if missing_symbols:
+                session.execute(insert(coin_table), [
+                    {"symbol": symbol, "enabled": True}
+                    for symbol in missing_symbols
+                ])
+
+            # Pairs are enabled only when both of their coins are
+            session.execute(update(pair_table).values(
+                enabled=pair_table.c.from_coin_id.in_(symbols) & pair_table.c.to_coin_id.in_(symbols),
+            ))
+
+            # For all the combinations of enabled coins, add a pair to the
+            # database if it doesn't exist
+            pair_keys = select([pair_table.c.from_coin_id, pair_table.c.to_coin_id])
+            existing_pairs = {tuple(row) for row in session.execute(pair_keys)}
+            missing_pairs = [
+                {"from_coin_id": from_symbol, "to_coin_id": to_symbol, "ratio": None, "enabled": True}
+                for from_symbol in symbols
+                for to_symbol in symbols
+                if from_symbol != to_symbol and (from_symbol, to_symbol) not in existing_pairs
+            ]
+
+            if missing_pairs:
+                session.execute(insert(pair_table), missing_pairs)
+
+        self.pair_table.load()
+
+        for listener in self.coins_listeners:
+            listener(list(symbols))
 
     def get_coins(self, only_enabled=True):
         with self.db_session() as session:
@@ -114,51 +204,68 @@ class Database:
             assert coin is not None
             cc = CoinHistory(coin)
             session.add(cc)
+
+            # Flush so that SQLAlchemy fills in the id column
+            session.flush()
             self.send_update(cc)
+            version = cc.id
+            session.expunge(coin)
+
+        self._current_coin = (version, coin)
+
+    def get_current_coin_version(self):
+        """
+        Get the id of the latest coin history entry, which changes every time
+        the current coin is set, by any process
+        """
+        with self.db_session() as session:
+            return session.query(func.max(CoinHistory.id)).scalar() or 0
 
     def get_current_coin(self):
+        cached_version, coin = self._current_coin
+
+        if self.writer and cached_version:
+            return coin
+
+        version = self.get_current_coin_version()
+
+        if version == cached_version:
+            return coin
+
         with self.db_session() as session:
-            current_coin = session.query(CoinHistory).order_by(CoinHistory.datetime.desc()).first()  # type: ignore
+            current_coin = session.query(CoinHistory).get(version)
 
             if current_coin is None:
                 return None
 
             coin = current_coin.coin
             session.expunge(coin)
-            return coin
+
+        self._current_coin = (version, coin)
+        return coin
 
     def get_pair(self, from_coin, to_coin):
         from_coin = self.get_coin(from_coin)
         to_coin = self.get_coin(to_coin)
-
-        with self.db_session() as session:
-            pair = session.query(Pair).filter(Pair.from_coin == from_coin, Pair.to_coin == to_coin).first()
-            session.expunge(pair)
-            return pair
+        return self.pair_table.get(from_coin.symbol, to_coin.symbol)
 
     def get_pairs_from(self, from_coin, only_enabled=True):
         from_coin = self.get_coin(from_coin)
+        return self.pair_table.get_from(from_coin.symbol, only_enabled)
 
-        with self.db_session() as session:
-            pairs = session.query(Pair).filter(Pair.from_coin == from_coin)
-
-            if only_enabled:
-                pairs = pairs.filter(Pair.enabled.is_(True))
-
-            pairs = pairs.all()
-            session.expunge_all()
-            return pairs
+    def get_pairs_to(self, to_coin, only_enabled=True):
+        to_coin = self.get_coin(to_coin)
+        return self.pair_table.get_to(to_coin.symbol, only_enabled)
 
     def get_pairs(self, only_enabled=True):
-        with self.db_session() as session:
-            pairs = session.query(Pair)
+        return self.pair_table.all(only_enabled)
 
-            if only_enabled:
-                pairs = pairs.filter(Pair.enabled.is_(True))
-
-            pairs = pairs.all()
-            session.expunge_all()
-            return pairs
+    def set_pair_ratios(self, ratios):
+        """
+        Update the ratio of several pairs, given as (pair, ratio) tuples,
+        the changes are written to the database in the background
+        """
+        self.pair_table.set_ratios(ratios)
 
     def log_scout(
         self,
@@ -167,11 +274,17 @@ class Database:
         current_coin_price: float,
         other_coin_price: float,
     ):
-        with self.db_session() as session:
-            pair = session.merge(pair)
-            sh = ScoutHistory(pair, target_ratio, current_coin_price, other_coin_price)
-            session.add(sh)
-            self.send_update(sh)
+        self.scout_history.append(pair.id, target_ratio, current_coin_price, other_coin_price)
+
+    def flush_scout_history(self):
+        self.scout_history.flush()
+
+    def close(self):
+        """
+        Write any pending data before shutting down
+        """
+        self.flush_scout_history()
+        self.pair_table.close()
 
     def prune_scout_history(self):
         time_diff = datetime.now() - timedelta(hours=self.config.SCOUT_RETENTION_TIME)
@@ -229,6 +342,7 @@ class Database:
 
     def create_database(self):
         Base.metadata.create_all(self.engine)
+        migrate(self.engine)
 
     def start_trade_log(self, from_coin: Coin, to_coin: Coin, selling: bool):
         return TradeLog(self, from_coin, to_coin, selling)
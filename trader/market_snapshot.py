@@ -0,0 +1,53 @@
+"""
+Market snapshot
+"""
+
+import time
+
+import numpy as np
+
+
+class MarketSnapshot:
+    """
+    Prices, balances, fees and filters captured at once at the beginning of
+    a scout tick, so that every decision of the tick is taken on the same
+    state of the market without going back to the manager.
+
+    Prices are an array indexed by the ids of `symbols`, fees and minimum
+    notional values are those of trading every coin against the bridge coin.
+    """
+
+    def __init__(self, coins, bridge_symbol, symbols, prices, balances, fees, min_notionals):
+        self.time = time.time()
+        self.coins = coins
+        self.bridge_symbol = bridge_symbol
+        self.symbols = symbols
+        self.prices = prices
+        self.balances = balances
+        self.fees = fees
+        self.min_notionals = min_notionals
+
+    def price(self, origin_symbol, target_symbol=None):
+        """
+        Price of the origin coin in the target coin (the bridge coin by
+        default), `None` if unknown
+        """
+        symbol_id = self.symbols.pair_id(origin_symbol, target_symbol or self.bridge_symbol)
+
+        if symbol_id >= len(self.prices) or np.isnan(self.prices[symbol_id]):
+            return None
+        return float(self.prices[symbol_id])
+
+    def balance(self, asset):
+        return self.balances.get(asset, 0.0)
+
+    def fee(self, coin_symbol, selling):
+        """
+        Fee of trading the coin against the bridge coin, `NaN` if unknown so
+        that jumps involving the coin are never scored
+        """
+        fee = self.fees.get((coin_symbol, selling), None)
+        return np.nan if fee is None else fee
+
+    def min_notional(self, coin_symbol):
+        return self.min_notionals[coin_symbol]
@@ -0,0 +1,139 @@
+"""
+Runtime metrics
+"""
+
+import os
+import json
+import time
+import threading
+
+from collections import deque
+
+HISTOGRAM_SAMPLES = 1024
+
+METRICS_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../.data/metrics.json'))
+
+
+def _percentile(sorted_samples, percent):
+    if not sorted_samples:
+        return 0.0
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * percent / 100))]
+
+
+class Counter:
+    """
+    Monotonic counter, safe to increment from any thread
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.value = 0
+        self._mutex = threading.Lock()
+
+    def increment(self, amount=1):
+        with self._mutex:
+            self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+
+class Histogram:
+    """
+    Distribution of observed values, percentiles are computed over the
+    most recent samples
+    """
+
+    def __init__(self, name, samples=HISTOGRAM_SAMPLES):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._samples = deque(maxlen=samples)
+        self._mutex = threading.Lock()
+
+    def observe(self, value):
+        with self._mutex:
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+            self._samples.append(value)
+
+    def percentile(self, percent):
+        with self._mutex:
+            samples = sorted(self._samples)
+        return _percentile(samples, percent)
+
+    def snapshot(self):
+        with self._mutex:
+            samples = sorted(self._samples)
+            count, total, maximum = self.count, self.total, self.max
+
+        return {
+            "count": count,
+            "mean": total / count if count else 0.0,
+            "p50": _percentile(samples, 50),
+            "p90": _percentile(samples, 90),
+            "p99": _percentile(samples, 99),
+            "max": maximum,
+        }
+
+
+class Metrics:
+    """
+    Registry of named metrics, created on first use
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._mutex = threading.Lock()
+
+    def _get(self, name, factory):
+        with self._mutex:
+            metric = self._metrics.get(name, None)
+
+            if metric is None:
+                metric = self._metrics[name] = factory(name)
+            return metric
+
+    def counter(self, name):
+        return self._get(name, Counter)
+
+    def histogram(self, name):
+        return self._get(name, Histogram)
+
+    def snapshot(self):
+        """
+        Get the current value of every registered metric
+        """
+        with self._mutex:
+            metrics = dict(self._metrics)
+
+        return {name: metric.snapshot() for name, metric in sorted(metrics.items())}
+
+    def dump(self, path=METRICS_PATH):
+        """
+        Write the current snapshot to disk for other processes to read
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+
+        with open(temp_path, "w") as file:
+            json.dump({"timestamp": time.time(), "metrics": self.snapshot()}, file)
+
+        os.replace(temp_path, path)
+
+
+def load_metrics(path=METRICS_PATH):
+    """
+    Read the last snapshot written by `Metrics.dump`, `None` if there is none
+    """
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+# Process-wide metrics registry
+metrics = Metrics()
@@ -0,0 +1,66 @@
+"""
+Database schema migrations
+"""
+
+from trader.logger import logger
+
+# Indexes are named the way SQLAlchemy names those declared with `index=True`,
+# so that databases created from the models already hold them
+HISTORY_INDEXES = (
+    ("coin_history", "datetime"),
+    ("scout_history", "datetime"),
+    ("scout_history", "pair_id"),
+    ("value", "coin_id"),
+    ("value", "datetime"),
+    ("value", "interval"),
+    ("trade_history", "datetime"),
+)
+
+
+def create_history_indexes(connection):
+    for table, column in HISTORY_INDEXES:
+        connection.exec_driver_sql(f'CREATE INDEX IF NOT EXISTS "ix_{table}_{column}" ON "{table}" ("{column}")')
+
+
+def materialize_pair_enabled(connection):
+    columns = {row[1] for row in connection.exec_driver_sql('PRAGMA table_info("pair")')}
+
+    if "enabled" not in columns:
+        connection.exec_driver_sql('ALTER TABLE "pair" ADD COLUMN "enabled" BOOLEAN')
+
+    # Backfill from the coins, a pair is enabled when both of its coins are
+    connection.exec_driver_sql(
+        'UPDATE "pair" SET "enabled" = ('
+        'SELECT count(*) FROM "coin" '
+        'WHERE "coin"."symbol" IN ("pair"."from_coin_id", "pair"."to_coin_id") AND "coin"."enabled" = 1'
+        ') = 2'
+    )
+    connection.exec_driver_sql('CREATE INDEX IF NOT EXISTS "ix_pair_enabled" ON "pair" ("enabled")')
+
+
+# Every migration brings the schema from the version at its index to the next
+# one, new migrations are only ever appended and must be idempotent
+MIGRATIONS = (
+    create_history_indexes,
+    materialize_pair_enabled,
+)
+
+
+def get_schema_version(connection):
+    return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def migrate(engine):
+    """
+    Apply the migrations the database has not been through yet, each in its
+    own transaction along with the bump of the schema version
+    """
+    with engine.connect() as connection:
+        version = get_schema_version(connection)
+
+    for target_version, migration in enumerate(MIGRATIONS[version:], version + 1):
+        logger.info(f"Migrating the database schema to version {target_version}")
+
+        with engine.begin() as connection:
+            migration(connection)
+            connection.exec_driver_sql(f"PRAGMA user_version={target_version:d}")
@@ -1,2 +1,3 @@
 from .api_manager import MockBinanceManager, cache
 from .database import MockDatabase
+from .exchange import FakeExchange, FakeBinanceClient, FakeWebSocketManager, FakeBinanceManager
@@ -4,6 +4,8 @@ Mock Binance API manager for backtesting
 
 import os
 
+import numpy as np
+
 from datetime import datetime, timedelta
 from collections import defaultdict
 from sqlitedict import SqliteDict
@@ -33,6 +35,9 @@ class MockBinanceManager(BinanceManager):
     def increment(self, interval=1):
         self.datetime += timedelta(minutes=interval)
 
+    def update_fees(self, coins):
+        pass  # Fees are constant when backtesting
+
     def get_fee(self, origin_coin, target_coin, selling):
         return 0.00075
 
@@ -72,6 +77,27 @@ class MockBinanceManager(BinanceManager):
             val = cache.get(key, None)
         return val
 
+    def get_price(self, origin_symbol, target_symbol):
+        return self.get_ticker_price(origin_symbol + target_symbol)
+
+    def get_ticker_prices(self):
+        """
+        Get the historical price of every interned ticker, indexed by symbol id
+        """
+        return np.array(
+            [self.get_ticker_price(symbol) or np.nan for symbol in self.cache.tickers.symbols],
+            dtype=np.float64,
+        )
+
+    def refresh_stale_tickers(self, ticker_symbols):
+        pass  # Historical prices are never stale
+
+    def is_ticker_stale(self, ticker_symbol):
+        return False
+
+    def get_balances(self):
+        return dict(self.balances)
+
     def get_currency_balance(self, currency_symbol, force=False):
         """
         Get balance of a specific coin
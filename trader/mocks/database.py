@@ -3,11 +3,18 @@ Database mock for backtesting
 """
 
 from trader import Database
+from trader.pair_table import PairTable
 
 
 class MockDatabase(Database):
     def __init__(self, config):
-        super().__init__(config, "sqlite:///")
+        super().__init__(config, "sqlite:///", writer=True)
+
+        # The in-memory database is bound to a single thread
+        self.pair_table = PairTable(self, write_behind=False)
 
     def log_scout(self, pair, target_ratio, current_coin_price, other_coin_price):
         pass
+
+    def flush_scout_history(self):
+        pass
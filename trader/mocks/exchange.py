@@ -0,0 +1,537 @@
+"""
+Fake Binance exchange for load testing
+"""
+
+import json
+import math
+import time
+import uuid
+import random
+import itertools
+import threading
+
+from functools import partial
+from collections import deque
+from binance.exceptions import BinanceAPIException
+
+from trader.logger import logger
+from trader.binance import BinanceManager, raw_stream
+from trader.binance.ticker_book import INVALID_SYMBOL_ERROR
+
+FILLER_ASSET = "FILL"
+
+# Standard deviation of the relative price change of an asset on every tick
+VOLATILITY = 0.001
+
+INSUFFICIENT_BALANCE_ERROR = -2010
+UNKNOWN_ORDER_ERROR = -2013
+INTERNAL_ERROR = -1001
+
+
+def _api_error(code, message):
+    return BinanceAPIException(None, 400, json.dumps({"code": code, "msg": message}))
+
+
+def _format(value):
+    return f"{value:.8f}"
+
+
+class FakeExchange:
+    """
+    In-process stand-in for Binance: markets whose prices follow a random
+    walk, a single account and its orders.
+
+    Every traded coin is listed against the quote asset, BTC and BNB, and
+    filler markets are added until `symbols` markets exist. On every tick,
+    a `tick_fraction` of the assets move and the mini tickers of the affected
+    markets are pushed to the connected fake websocket managers.
+
+    Limit orders are filled at their price `fill_latency` seconds after being
+    placed. REST requests fail with probability `error_rate` and websocket
+    messages are dropped with probability `drop_rate`.
+    """
+
+    def __init__(self, coins=(), quote="USDT", symbols=100, tick_rate=1, tick_fraction=0.5,
+                 fill_latency=0.1, error_rate=0.0, drop_rate=0.0, balances=None, fee=0.001, seed=None):
+        self.quote = quote
+        self.tick_rate = tick_rate
+        self.tick_fraction = tick_fraction
+        self.fill_latency = fill_latency
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.fee = fee
+
+        self.random = random.Random(seed)
+        self.markets = {}
+        self.values = {}
+        self.balances = dict(balances or {quote: 1000.0})
+        self.orders = {}
+        self.events_sent = 0
+
+        self._order_ids = itertools.count(1)
+        self._websocket_managers = []
+        self._mutex = threading.RLock()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="fake-exchange", daemon=True)
+
+        self._list_markets(coins, symbols)
+
+    def _list_markets(self, coins, symbols):
+        bases = {*coins, "BTC", "BNB"} - {self.quote}
+
+        for base in sorted(bases):
+            for quote in (self.quote, "BTC", "BNB"):
+                if base != quote and quote + base not in self.markets:
+                    self.markets[base + quote] = (base, quote)
+
+        for index in itertools.count():
+            if len(self.markets) >= symbols:
+                break
+            self.markets[f"{FILLER_ASSET}{index}{self.quote}"] = (f"{FILLER_ASSET}{index}", self.quote)
+
+        assets = {asset for market in self.markets.values() for asset in market}
+        self.values = {asset: self.random.uniform(0.1, 1000) for asset in assets}
+        self.values[self.quote] = 1.0
+
+    def price(self, symbol):
+        base, quote = self.markets[symbol]
+        return self.values[base] / self.values[quote]
+
+    def start(self):
+        self._thread.start()
+        logger.info(f"Fake exchange started with {len(self.markets)} markets")
+
+    def stop(self):
+        self._stopping.set()
+
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def connect(self, websocket_manager):
+        with self._mutex:
+            self._websocket_managers.append(websocket_manager)
+
+    def disconnect(self, websocket_manager):
+        with self._mutex:
+            if websocket_manager in self._websocket_managers:
+                self._websocket_managers.remove(websocket_manager)
+
+    def maybe_fail(self):
+        if self.error_rate and self.random.random() < self.error_rate:
+            raise _api_error(INTERNAL_ERROR, "Internal error; unable to process your request. Please try again.")
+
+    def _run(self):
+        interval = 1 / self.tick_rate
+
+        while not self._stopping.wait(interval):
+            self.tick()
+
+    def tick(self):
+        """
+        Move the price of some assets and push the tickers of the affected markets
+        """
+        with self._mutex:
+            moved = set()
+
+            for asset in self.values:
+                if asset != self.quote and self.random.random() < self.tick_fraction:
+                    self.values[asset] *= math.exp(self.random.gauss(0, VOLATILITY))
+                    moved.add(asset)
+
+            event_time = int(time.time() * 1000)
+            events = []
+
+            for symbol, (base, quote) in self.markets.items():
+                if base in moved or quote in moved:
+                    price = _format(self.price(symbol))
+                    events.append({
+                        "e": "24hrMiniTicker",
+                        "E": event_time,
+                        "s": symbol,
+                        "c": price,
+                        "o": price,
+                        "h": price,
+                        "l": price,
+                        "v": _format(0),
+                        "q": _format(0),
+                    })
+
+            websocket_managers = list(self._websocket_managers)
+
+        for websocket_manager in websocket_managers:
+            websocket_manager.push_tickers(events)
+
+        self.events_sent += len(events)
+
+    def _push_user_event(self, event):
+        with self._mutex:
+            websocket_managers = list(self._websocket_managers)
+
+        for websocket_manager in websocket_managers:
+            websocket_manager.push_user_event(event)
+
+    def _push_order(self, order):
+        now = int(time.time() * 1000)
+        self._push_user_event({
+            "e": "executionReport",
+            "E": now,
+            "s": order["symbol"],
+            "S": order["side"],
+            "o": order["type"],
+            "i": order["orderId"],
+            "Z": order["cummulativeQuoteQty"],
+            "X": order["status"],
+            "p": order["price"],
+            "T": now,
+        })
+
+    def _push_balances(self, assets):
+        now = int(time.time() * 1000)
+
+        with self._mutex:
+            balances = [{"a": asset, "f": _format(self.balances.get(asset, 0.0)), "l": _format(0)} for asset in assets]
+
+        self._push_user_event({"e": "outboundAccountPosition", "E": now, "u": now, "B": balances})
+
+    def place_order(self, symbol, side, order_type, quantity, price=None):
+        if symbol not in self.markets:
+            raise _api_error(INVALID_SYMBOL_ERROR, "Invalid symbol.")
+
+        base, quote = self.markets[symbol]
+        quantity = float(quantity)
+        price = float(price) if price is not None else self.price(symbol)
+
+        with self._mutex:
+            # Funds are locked until the order is filled or cancelled
+            spent, amount = (quote, quantity * price) if side == "BUY" else (base, quantity)
+
+            if self.balances.get(spent, 0.0) < amount:
+                raise _api_error(INSUFFICIENT_BALANCE_ERROR, "Account has insufficient balance for requested action.")
+
+            self.balances[spent] -= amount
+            now = int(time.time() * 1000)
+            order = {
+                "symbol": symbol,
+                "orderId": next(self._order_ids),
+                "clientOrderId": uuid.uuid4().hex,
+                "transactTime": now,
+                "time": now,
+                "price": _format(price),
+                "origQty": _format(quantity),
+                "executedQty": _format(0),
+                "cummulativeQuoteQty": _format(0),
+                "status": "NEW",
+                "timeInForce": "GTC",
+                "type": order_type,
+                "side": side,
+            }
+            self.orders[order["orderId"]] = order
+
+        self._push_order(order)
+        self._push_balances((spent,))
+
+        timer = threading.Timer(self.fill_latency, self._fill_order, (order["orderId"],))
+        timer.daemon = True
+        timer.start()
+
+        return dict(order)
+
+    def _fill_order(self, order_id):
+        with self._mutex:
+            order = self.orders[order_id]
+
+            if order["status"] != "NEW":
+                return
+
+            base, quote = self.markets[order["symbol"]]
+            quantity = float(order["origQty"])
+            quote_quantity = quantity * float(order["price"])
+
+            if order["side"] == "BUY":
+                self.balances[base] = self.balances.get(base, 0.0) + quantity * (1 - self.fee)
+            else:
+                self.balances[quote] = self.balances.get(quote, 0.0) + quote_quantity * (1 - self.fee)
+
+            order.update(
+                status="FILLED",
+                executedQty=_format(quantity),
+                cummulativeQuoteQty=_format(quote_quantity),
+            )
+            order = dict(order)
+
+        self._push_order(order)
+        self._push_balances((base, quote))
+
+    def get_order(self, order_id):
+        with self._mutex:
+            if order_id not in self.orders:
+                raise _api_error(UNKNOWN_ORDER_ERROR, "Order does not exist.")
+            return dict(self.orders[order_id])
+
+    def cancel_order(self, order_id):
+        with self._mutex:
+            order = self.get_order(order_id)
+
+            if order["status"] != "NEW":
+                raise _api_error(UNKNOWN_ORDER_ERROR, "Unknown order sent.")
+
+            base, quote = self.markets[order["symbol"]]
+
+            if order["side"] == "BUY":
+                refunded, amount = quote, float(order["origQty"]) * float(order["price"])
+            else:
+                refunded, amount = base, float(order["origQty"])
+
+            self.balances[refunded] += amount
+            self.orders[order_id]["status"] = "CANCELED"
+            order = dict(self.orders[order_id])
+
+        self._push_order(order)
+        self._push_balances((refunded,))
+        return order
+
+    def account(self):
+        with self._mutex:
+            return {
+                "updateTime": int(time.time() * 1000),
+                "balances": [
+                    {"asset": asset, "free": _format(balance), "locked": _format(0)}
+                    for asset, balance in self.balances.items()
+                ],
+            }
+
+    def symbol_info(self, symbol):
+        base, quote = self.markets[symbol]
+        return {
+            "symbol": symbol,
+            "status": "TRADING",
+            "baseAsset": base,
+            "quoteAsset": quote,
+            "filters": [
+                {
+                    "filterType": "PRICE_FILTER",
+                    "minPrice": "0.00000100",
+                    "maxPrice": "1000000.00000000",
+                    "tickSize": "0.00000100",
+                },
+                {
+                    "filterType": "LOT_SIZE",
+                    "minQty": "0.00100000",
+                    "maxQty": "9000000.00000000",
+                    "stepSize": "0.00100000",
+                },
+                {"filterType": "MIN_NOTIONAL", "minNotional": "10.00000000"},
+            ],
+        }
+
+
+class FakeBinanceClient:
+    """
+    Subset of the python-binance client used by the bot, served by a fake exchange
+    """
+
+    def __init__(self, exchange):
+        self.exchange = exchange
+
+    def ping(self):
+        self.exchange.maybe_fail()
+        return {}
+
+    def get_account(self):
+        self.exchange.maybe_fail()
+        return self.exchange.account()
+
+    def get_symbol_ticker(self, symbol=None):
+        self.exchange.maybe_fail()
+
+        if symbol is None:
+            return [
+                {"symbol": market, "price": _format(self.exchange.price(market))}
+                for market in self.exchange.markets
+            ]
+
+        if symbol not in self.exchange.markets:
+            raise _api_error(INVALID_SYMBOL_ERROR, "Invalid symbol.")
+        return {"symbol": symbol, "price": _format(self.exchange.price(symbol))}
+
+    def get_symbol_info(self, symbol):
+        self.exchange.maybe_fail()
+        return self.exchange.symbol_info(symbol) if symbol in self.exchange.markets else None
+
+    def get_exchange_info(self):
+        self.exchange.maybe_fail()
+        return {"symbols": [self.exchange.symbol_info(symbol) for symbol in self.exchange.markets]}
+
+    def get_trade_fee(self):
+        self.exchange.maybe_fail()
+        return [
+            {"symbol": symbol, "makerCommission": str(self.exchange.fee), "takerCommission": str(self.exchange.fee)}
+            for symbol in self.exchange.markets
+        ]
+
+    def get_bnb_burn_spot_margin(self):
+        self.exchange.maybe_fail()
+        return {"spotBNBBurn": False, "interestBNBBurn": False}
+
+    def order_limit_buy(self, symbol, quantity, price):
+        self.exchange.maybe_fail()
+        return self.exchange.place_order(symbol, "BUY", "LIMIT", quantity, price)
+
+    def order_limit_sell(self, symbol, quantity, price):
+        self.exchange.maybe_fail()
+        return self.exchange.place_order(symbol, "SELL", "LIMIT", quantity, price)
+
+    def order_market_sell(self, symbol, quantity):
+        self.exchange.maybe_fail()
+        return self.exchange.place_order(symbol, "SELL", "MARKET", quantity)
+
+    def get_order(self, symbol, orderId):  # pylint: disable=invalid-name
+        self.exchange.maybe_fail()
+        return self.exchange.get_order(int(orderId))
+
+    def cancel_order(self, symbol, orderId):  # pylint: disable=invalid-name
+        self.exchange.maybe_fail()
+        return self.exchange.cancel_order(int(orderId))
+
+
+class FakeWebSocketManager:
+    """
+    Subset of the UNICORN Binance WebSocket API manager used by the bot,
+    streaming the mini tickers and the user data of a fake exchange.
+
+    Messages are delivered on the exchange threads, either as raw JSON or
+    in the UnicornFy format depending on `output_default`.
+    """
+
+    def __init__(self, fake_exchange, output_default="UnicornFy", enable_stream_signal_buffer=False,
+                 exchange=None, process_stream_data=None, process_stream_signals=None):
+        self.fake_exchange = fake_exchange
+        self.raw_output = output_default == "raw_data"
+        self.enable_stream_signal_buffer = enable_stream_signal_buffer
+        self.process_stream_data = process_stream_data
+        self.process_stream_signals = process_stream_signals
+
+        self.streams = {}
+        self.stream_buffer = deque()
+        self.stream_signal_buffer = deque()
+        self._stopping = False
+        self._mutex = threading.Lock()
+
+        fake_exchange.connect(self)
+
+    def create_stream(self, channels, markets, api_key=None, api_secret=None):
+        stream_id = str(uuid.uuid4())
+
+        with self._mutex:
+            self.streams[stream_id] = {"channels": set(channels), "markets": set(markets)}
+
+        if self.process_stream_signals is not None:
+            self.process_stream_signals(signal_type="CONNECT", stream_id=stream_id)
+        elif self.enable_stream_signal_buffer:
+            self.stream_signal_buffer.append({"type": "CONNECT", "stream_id": stream_id})
+
+        return stream_id
+
+    def subscribe_to_stream(self, stream_id, channels=(), markets=()):
+        with self._mutex:
+            self.streams[stream_id]["channels"].update(channels)
+            self.streams[stream_id]["markets"].update(markets)
+
+    def unsubscribe_from_stream(self, stream_id, channels=(), markets=()):
+        with self._mutex:
+            self.streams[stream_id]["channels"].difference_update(channels)
+            self.streams[stream_id]["markets"].difference_update(markets)
+
+    def get_stream_info(self, stream_id):
+        with self._mutex:
+            stream = self.streams[stream_id]
+            return {"channels": list(stream["channels"]), "markets": list(stream["markets"])}
+
+    def pop_stream_data_from_stream_buffer(self):
+        try:
+            return self.stream_buffer.popleft()
+        except IndexError:
+            return False
+
+    def pop_stream_signal_from_stream_signal_buffer(self):
+        try:
+            return self.stream_signal_buffer.popleft()
+        except IndexError:
+            return False
+
+    def is_manager_stopping(self):
+        return self._stopping
+
+    def stop_manager_with_all_streams(self):
+        self._stopping = True
+        self.fake_exchange.disconnect(self)
+
+    def _deliver(self, message):
+        if self.fake_exchange.drop_rate and self.fake_exchange.random.random() < self.fake_exchange.drop_rate:
+            return
+
+        if self.process_stream_data is not None:
+            self.process_stream_data(message)
+        else:
+            self.stream_buffer.append(message)
+
+    def push_tickers(self, events):
+        with self._mutex:
+            streams = [(set(stream["channels"]), set(stream["markets"])) for stream in self.streams.values()]
+
+        for channels, markets in streams:
+            if "!miniTicker" in markets:
+                self._deliver(self._ticker_message("!miniTicker@arr", events))
+            elif "miniTicker" in channels:
+                for event in events:
+                    market = event["s"].lower()
+
+                    if market in markets:
+                        self._deliver(self._ticker_message(f"{market}@miniTicker", event))
+
+    def push_user_event(self, event):
+        with self._mutex:
+            user_data = any("!userData" in stream["markets"] for stream in self.streams.values())
+
+        if user_data:
+            self._deliver(json.dumps(event) if self.raw_output else raw_stream.to_user_data_event(event))
+
+    def _ticker_message(self, stream, data):
+        if self.raw_output:
+            return json.dumps({"stream": stream, "data": data})
+
+        return {
+            "stream_type": stream,
+            "event_type": "24hrMiniTicker",
+            "data": [
+                {
+                    "stream_type": stream,
+                    "event_type": event["e"],
+                    "event_time": event["E"],
+                    "symbol": event["s"],
+                    "close_price": event["c"],
+                    "open_price": event["o"],
+                    "high_price": event["h"],
+                    "low_price": event["l"],
+                    "taker_by_base_asset_volume": event["v"],
+                    "taker_by_quote_asset_volume": event["q"],
+                }
+                for event in (data if isinstance(data, list) else (data,))
+            ],
+        }
+
+
+class FakeBinanceManager(BinanceManager):
+    """
+    Binance API manager pointed at a fake exchange instead of Binance
+    """
+
+    exchange_info_path = None  # Never overwrite the exchange information of the real exchange
+
+    def __init__(self, config, database, exchange):
+        self.exchange = exchange
+        self.websocket_manager_class = partial(FakeWebSocketManager, exchange)
+        super().__init__(config, database)
+
+    def create_client(self):
+        return FakeBinanceClient(self.exchange)
@@ -18,7 +18,7 @@ class CoinHistory(Base):
     coins_id = Column(String, ForeignKey("coin.symbol"))
     coin = relationship(Coin)
 
-    datetime = Column(DateTime)
+    datetime = Column(DateTime, index=True)
 
     def __init__(self, coin: Coin):
         self.coin = coin
@@ -24,16 +24,16 @@ class CoinValue(Base):
 
     id = Column(Integer, primary_key=True)
 
-    coin_id = Column(String, ForeignKey("coin.symbol"))
+    coin_id = Column(String, ForeignKey("coin.symbol"), index=True)
     coin = relationship("Coin")
 
     balance = Column(Float)
     price_usd = Column(Float)
     price_btc = Column(Float)
 
-    interval = Column(Enum(Interval))
+    interval = Column(Enum(Interval), index=True)
 
-    datetime = Column(DateTime)
+    datetime = Column(DateTime, index=True)
 
     def __init__(
         self,
@@ -2,8 +2,8 @@
 Coin pairs
 """
 
-from sqlalchemy import Column, Float, ForeignKey, Integer, String, func, or_, select
-from sqlalchemy.orm import column_property, relationship
+from sqlalchemy import Boolean, Column, Float, ForeignKey, Integer, String
+from sqlalchemy.orm import relationship
 
 from trader.models import Base, Coin
 
@@ -21,17 +21,14 @@ class Pair(Base):
 
     ratio = Column(Float)
 
-    enabled = column_property(
-        select([func.count(Coin.symbol) == 2])
-        .where(or_(Coin.symbol == from_coin_id, Coin.symbol == to_coin_id))
-        .where(Coin.enabled.is_(True))
-        .scalar_subquery()  # type: ignore
-    )
+    # Whether both coins are enabled, maintained by `Database.set_coins`
+    enabled = Column(Boolean, index=True)
 
     def __init__(self, from_coin: Coin, to_coin: Coin, ratio=None):
         self.from_coin = from_coin
         self.to_coin = to_coin
         self.ratio = ratio
+        self.enabled = bool(from_coin.enabled and to_coin.enabled)
 
     def __repr__(self):
         return f"{self.from_coin.symbol}{self.to_coin.symbol}"
@@ -16,14 +16,14 @@ class ScoutHistory(Base):
 
     id = Column(Integer, primary_key=True)
 
-    pair_id = Column(String, ForeignKey("pair.id"))
+    pair_id = Column(String, ForeignKey("pair.id"), index=True)
     pair = relationship("Pair")
 
     target_ratio = Column(Float)
     current_coin_price = Column(Float)
     other_coin_price = Column(Float)
 
-    datetime = Column(DateTime)
+    datetime = Column(DateTime, index=True)
 
     def __init__(
         self,
@@ -0,0 +1,162 @@
+"""
+In-memory pair table
+"""
+
+import threading
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from trader.logger import logger
+from trader.models import Pair
+
+PAIR_TABLE_FLUSH_INTERVAL = 5
+
+
+class PairTable:
+    """
+    Authoritative in-memory copy of the `pair` table, indexed by
+    (from_coin, to_coin).
+
+    Reads never touch the database. Ratio changes are applied in memory
+    immediately and written back in batches by a background thread, or
+    synchronously when `write_behind` is disabled.
+    """
+
+    def __init__(self, database, write_behind=True, flush_interval=PAIR_TABLE_FLUSH_INTERVAL):
+        self.database = database
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+
+        self.loaded = False
+        self._pairs = {}
+        self._pairs_from = {}
+        self._pairs_to = {}
+
+        self._dirty = {}
+        self._mutex = threading.Lock()
+        self._flush_mutex = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    def load(self):
+        """
+        (Re)load all the pairs from the database
+        """
+        self.flush()
+
+        with self.database.db_session() as session:
+            pairs = session.query(Pair).all()
+            session.expunge_all()
+
+        pairs_from = {}
+        pairs_to = {}
+
+        for pair in pairs:
+            pairs_from.setdefault(pair.from_coin_id, []).append(pair)
+            pairs_to.setdefault(pair.to_coin_id, []).append(pair)
+
+        # Swap the indexes at once so that readers never see a partial table
+        self._pairs, self._pairs_from, self._pairs_to = (
+            {(pair.from_coin_id, pair.to_coin_id): pair for pair in pairs},
+            pairs_from,
+            pairs_to,
+        )
+        self.loaded = True
+
+    def _ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+
+    def get(self, from_symbol, to_symbol):
+        self._ensure_loaded()
+        return self._pairs.get((from_symbol, to_symbol), None)
+
+    def get_from(self, from_symbol, only_enabled=True):
+        self._ensure_loaded()
+        return [pair for pair in self._pairs_from.get(from_symbol, []) if pair.enabled or not only_enabled]
+
+    def get_to(self, to_symbol, only_enabled=True):
+        self._ensure_loaded()
+        return [pair for pair in self._pairs_to.get(to_symbol, []) if pair.enabled or not only_enabled]
+
+    def all(self, only_enabled=True):
+        self._ensure_loaded()
+        return [pair for pair in self._pairs.values() if pair.enabled or not only_enabled]
+
+    def set_ratios(self, ratios):
+        """
+        Update the ratio of several pairs, given as (pair, ratio) tuples
+        """
+        with self._mutex:
+            for pair, ratio in ratios:
+                pair.ratio = ratio
+                self._dirty[pair.id] = ratio
+
+        if not self.write_behind:
+            self.flush()
+            return
+
+        if self._thread is None:
+            self.start()
+
+    def flush(self):
+        """
+        Write all the pending ratio changes in one batch
+        """
+        with self._flush_mutex:
+            with self._mutex:
+                dirty = self._dirty
+                self._dirty = {}
+
+            if not dirty:
+                return 0
+
+            statement = (
+                update(Pair.__table__)
+                .where(Pair.__table__.c.id == bindparam("pair_id"))
+                .values(ratio=bindparam("ratio"))
+            )
+
+            try:
+                with self.database.db_session() as session:
+                    session.execute(statement, [
+                        {"pair_id": pair_id, "ratio": ratio}
+                        for pair_id, ratio in dirty.items()
+                    ])
+            except SQLAlchemyError as e:
+                logger.warning(f"Failed to write {len(dirty)} pair ratios, retrying later: {e}")
+
+                with self._mutex:
+                    # Ratios updated in the meantime are more recent, keep them
+                    self._dirty = {**dirty, **self._dirty}
+                return 0
+
+            return len(dirty)
+
+    def _writer(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._stopping = False
+        self._thread = threading.Thread(target=self._writer, name="pair-table-writer", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """
+        Stop the background writer and write any pending ratio
+        """
+        if self._thread is not None:
+            self._stopping = True
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
+
+        self.flush()
@@ -0,0 +1,124 @@
+"""
+Vectorized ratio scoring
+"""
+
+import numpy as np
+
+
+class RatioEngine:
+    """
+    Keep the pair ratio targets, the current bridge prices and the fees
+    of every enabled coin as aligned arrays so that every candidate jump
+    can be scored in a single vectorized pass.
+
+    Row `i` and column `j` of the matrices refer to the jump from the
+    i-th coin to the j-th coin, in the order of `self.coins`. The bridge
+    ticker of the i-th coin is `self.symbols[i]`, whose id in the shared
+    price array is `self.symbol_ids[i]`, so the pair at `(i, j)` trades
+    between the tickers `symbol_ids[i]` and `symbol_ids[j]`.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.coins = []
+        self.index = {}
+        self.symbols = []
+        self.symbol_ids = np.empty(0, dtype=np.intp)
+        self.pairs = []
+        self.targets = np.empty((0, 0))
+        self.prices = np.empty(0)
+        self.sell_fees = np.empty(0)
+        self.buy_fees = np.empty(0)
+
+    def load(self, pairs, symbol_id):
+        """
+        Rebuild the arrays from a list of pairs, `symbol_id` returns the id
+        of a ticker symbol in the price array
+        """
+        coins = {pair.from_coin.symbol: pair.from_coin for pair in pairs}
+        coins.update({pair.to_coin.symbol: pair.to_coin for pair in pairs})
+        size = len(coins)
+
+        self.coins = [coins[symbol] for symbol in sorted(coins)]
+        self.index = {coin.symbol: i for i, coin in enumerate(self.coins)}
+        self.symbols = [coin.symbol + self.config.BRIDGE_COIN_SYMBOL for coin in self.coins]
+        self.symbol_ids = np.array([symbol_id(symbol) for symbol in self.symbols], dtype=np.intp)
+        self.pairs = [{} for _ in range(size)]
+        self.targets = np.full((size, size), np.nan)
+        self.prices = np.full(size, np.nan)
+        self.sell_fees = np.zeros(size)
+        self.buy_fees = np.zeros(size)
+
+        for pair in pairs:
+            self.set_target(pair, pair.ratio)
+
+    def set_target(self, pair, ratio):
+        """
+        Update the stored ratio target of a single pair
+        """
+        i = self.index.get(pair.from_coin_id)
+        j = self.index.get(pair.to_coin_id)
+
+        if i is None or j is None:
+            return
+
+        self.pairs[i][j] = pair
+        self.targets[i, j] = np.nan if ratio is None else ratio
+
+    def pairs_from(self, symbol):
+        """
+        Get the column index and the pair of every jump from the given coin
+        """
+        i = self.index.get(symbol)
+
+        if i is None:
+            return []
+        return list(self.pairs[i].items())
+
+    def update_prices(self, prices):
+        """
+        Gather the bridge price of every coin from the price array indexed
+        by symbol id, unknown prices being `NaN`
+        """
+        np.take(prices, self.symbol_ids, out=self.prices)
+
+    def update_fees(self, get_fee):
+        """
+        Refresh the fee vectors, `get_fee(coin, selling)` returns the fee
+        for trading the coin against the bridge coin
+        """
+        for i, coin in enumerate(self.coins):
+            self.sell_fees[i] = get_fee(coin, True)
+            self.buy_fees[i] = get_fee(coin, False)
+
+    def _score(self, coin_prices, sell_fees, targets):
+        # Obtain (current coin)/(optional coin), broadcasting over the targets
+        coin_opt_coin_ratio = coin_prices / self.prices
+        transaction_fee = sell_fees + self.buy_fees - sell_fees * self.buy_fees
+
+        if self.config.USE_MARGIN == "yes":
+            return (1 - transaction_fee) * coin_opt_coin_ratio / targets - 1 - self.config.SCOUT_MARGIN / 100
+        return (coin_opt_coin_ratio - transaction_fee * self.config.SCOUT_MULTIPLIER * coin_opt_coin_ratio) - targets
+
+    def score_from(self, symbol, coin_price=None):
+        """
+        Score every jump from the given coin, missing pairs and prices
+        yield `NaN`
+        """
+        i = self.index.get(symbol)
+
+        if i is None:
+            return None
+
+        if coin_price is None:
+            coin_price = self.prices[i]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self._score(coin_price, self.sell_fees[i], self.targets[i])
+
+    def score_matrix(self):
+        """
+        Score every jump from every coin at once
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self._score(self.prices[:, None], self.sell_fees[:, None], self.targets)
@@ -0,0 +1,109 @@
+"""
+Buffered scout history writer
+"""
+
+import time
+import threading
+
+from collections import deque
+from datetime import datetime
+from sqlalchemy.exc import SQLAlchemyError
+
+from trader.logger import logger
+from trader.metrics import metrics
+from trader.models import ScoutHistory
+
+SCOUT_HISTORY_MAX_ROWS = 50000
+SCOUT_HISTORY_FLUSH_ROWS = 5000
+SCOUT_HISTORY_FLUSH_INTERVAL = 10
+
+
+class ScoutHistoryBuffer:
+    """
+    Collect scout history rows in memory and write them with a single bulk
+    insert, either when explicitly flushed (once per scout tick) or when
+    the size or time threshold is reached.
+
+    When the database cannot keep up, the oldest rows are dropped so that
+    at most `max_rows` rows are ever held in memory.
+    """
+
+    def __init__(
+        self,
+        database,
+        max_rows=SCOUT_HISTORY_MAX_ROWS,
+        flush_rows=SCOUT_HISTORY_FLUSH_ROWS,
+        flush_interval=SCOUT_HISTORY_FLUSH_INTERVAL,
+    ):
+        self.database = database
+        self.max_rows = max_rows
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+
+        self.dropped = metrics.counter("scout_history.dropped")
+        self.written = metrics.counter("scout_history.written")
+
+        self._rows = deque()
+        self._mutex = threading.Lock()
+        self._flush_mutex = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _push(self, rows):
+        # Must be called with the mutex held
+        self._rows.extend(rows)
+        overflow = len(self._rows) - self.max_rows
+
+        if overflow > 0:
+            for _ in range(overflow):
+                self._rows.popleft()
+            self.dropped.increment(overflow)
+
+    def append(self, pair_id, target_ratio, current_coin_price, other_coin_price):
+        with self._mutex:
+            self._push([{
+                "pair_id": pair_id,
+                "target_ratio": target_ratio,
+                "current_coin_price": current_coin_price,
+                "other_coin_price": other_coin_price,
+                "datetime": datetime.utcnow(),
+            }])
+            should_flush = (
+                len(self._rows) >= self.flush_rows
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        """
+        Write all the buffered rows in one bulk insert
+        """
+        with self._flush_mutex:
+            with self._mutex:
+                rows = list(self._rows)
+                self._rows.clear()
+                self._last_flush = time.monotonic()
+
+            if not rows:
+                return 0
+
+            try:
+                with self.database.db_session() as session:
+                    session.bulk_insert_mappings(ScoutHistory, rows)
+            except SQLAlchemyError as e:
+                logger.warning(f"Failed to write {len(rows)} scout history rows, retrying later: {e}")
+
+                with self._mutex:
+                    # Put the rows back in front of the ones logged in the meantime
+                    pending = list(self._rows)
+                    self._rows.clear()
+                    self._push(rows)
+                    self._push(pending)
+                return 0
+
+            self.written.increment(len(rows))
+            return len(rows)
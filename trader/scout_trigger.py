@@ -0,0 +1,55 @@
+"""
+Event-driven scouting
+"""
+
+import time
+import threading
+
+
+class ScoutTrigger:
+    """
+    Wake the main loop up as soon as the price of a watched symbol changes.
+
+    Notifications arriving while a scout is pending are coalesced: the
+    scout runs `debounce` seconds after the first one, and never sooner
+    than `min_interval` seconds after the previous scout.
+    """
+
+    def __init__(self, debounce, min_interval):
+        self.debounce = debounce
+        self.min_interval = min_interval
+        self.watched = frozenset()
+
+        self._pending = threading.Event()
+        self._last_scout = 0.0
+
+    def watch(self, symbols):
+        """
+        Replace the set of symbols whose price changes trigger a scout
+        """
+        self.watched = frozenset(symbols)
+
+    def notify(self, symbols):
+        """
+        Called from the stream thread with the symbols whose price changed
+        """
+        if not self.watched.isdisjoint(symbols):
+            self._pending.set()
+
+    def wait(self, timeout):
+        """
+        Block until a scout should run or the timeout expires,
+        return whether a scout should run
+        """
+        if not self._pending.wait(timeout):
+            return False
+
+        delay = max(self.debounce, self._last_scout + self.min_interval - time.monotonic())
+
+        if delay > 0:
+            time.sleep(delay)
+
+        # Clear after the delay so that notifications received meanwhile are coalesced
+        self._pending.clear()
+        self._last_scout = time.monotonic()
+        return True
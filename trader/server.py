@@ -8,6 +8,7 @@ from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 
 from trader import Config, Database
+from trader.metrics import load_metrics
 from trader.models import Coin, CoinHistory, CoinValue, TradeHistory, ScoutHistory, Pair
 
 
@@ -19,6 +20,9 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 config = Config()
 database = Database(config)
 
+# The server may start before the trader, bring the schema up to date (idempotent)
+database.create_database()
+
 
 def filter_period(query, model):
     period = request.args.get("period", "all")  # type: ignore
@@ -134,6 +138,11 @@ def pairs():
         return jsonify([pair.info() for pair in all_pairs])
 
 
+@app.route("/api/metrics")
+def runtime_metrics():
+    return jsonify(load_metrics() or {})
+
+
 @socketio.on("update", namespace="/backend")
 def handle_my_custom_event(json):
     emit("update", json, namespace="/frontend", broadcast=True)
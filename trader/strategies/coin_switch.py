@@ -17,7 +17,7 @@ class Strategy(Trader):
 
         self.logger.over(f"Scouting pair {term.yellow_bold(pair_symbol)}...")
 
-        current_coin_price = self.manager.get_ticker_price(pair_symbol)
+        current_coin_price = self.market.price(current_coin.symbol)
 
         if current_coin_price is None:
             self.logger.warning(f"Ticker price for {term.yellow_bold(pair_symbol)} not found, not scouting")
@@ -28,10 +28,7 @@ class Strategy(Trader):
     def bridge_scout(self):
         current_coin = self.database.get_current_coin()
 
-        if self.manager.get_currency_balance(current_coin.symbol) > self.manager.get_min_notional(
-            current_coin.symbol,
-            self.config.BRIDGE_COIN.symbol,
-        ):
+        if self.market.balance(current_coin.symbol) > self.market.min_notional(current_coin.symbol):
             # Only scout if we don't have enough of the current coin
             return
 
@@ -18,16 +18,17 @@ class Strategy(Trader):
         coin_possessed = False
         current_coin = self.database.get_current_coin()
 
-        for coin in self.database.get_coins():
-            pair_symbol = coin.symbol + self.config.BRIDGE_COIN.symbol
-            coin_balance = self.manager.get_currency_balance(coin.symbol)
-            coin_price = self.manager.get_ticker_price(pair_symbol)
+        for coin in self.market.coins:
+            coin_balance = self.market.balance(coin.symbol)
+            coin_price = self.market.price(coin.symbol)
 
             if coin_price is None:
-                self.logger.warning(f"Ticker price for {term.yellow_bold(pair_symbol)} not found, not scouting")
+                self.logger.warning(
+                    f"Ticker price for {term.yellow_bold(coin + self.config.BRIDGE_COIN)} not found, not scouting"
+                )
                 continue
 
-            min_notional = self.manager.get_min_notional(coin.symbol, self.config.BRIDGE_COIN.symbol)
+            min_notional = self.market.min_notional(coin.symbol)
 
             if coin.symbol != current_coin.symbol and coin_price * coin_balance < min_notional:
                 continue
@@ -38,3 +39,9 @@ class Strategy(Trader):
 
         if not coin_possessed:
             self.bridge_scout()
+
+    def get_watched_symbols(self):
+        """
+        Any coin we hold can be scouted, watch all of them
+        """
+        return {coin + self.config.BRIDGE_COIN for coin in self.database.get_coins()}
@@ -7,8 +7,11 @@ import random
 
 from datetime import datetime as _datetime
 
+import numpy as np
+
 from trader.logger import logger, discord_logger, term
-from trader.models import Coin, CoinValue, Pair
+from trader.models import Coin, CoinValue
+from trader.ratio_engine import RatioEngine
 
 
 class Trader:
@@ -17,18 +20,36 @@ class Trader:
         self.database = database
         self.config = config
         self.manager = manager
+        self.ratio_engine = RatioEngine(config)
+        self.market = None
 
     def initialize(self):
         self.initialize_trade_thresholds()
+        self.initialize_ratio_engine()
         self.initialize_current_coin()
         self.initialize_starting_balances()
 
+    def initialize_ratio_engine(self):
+        """
+        Load the ratio targets of all the enabled pairs into the ratio engine
+        """
+        self.ratio_engine.load(self.database.get_pairs(), self.manager.symbol_id)
+
     def transaction_through_bridge(self, pair):
         """
         Jump from the source coin to the destination coin, passing through
         the bridge coin if necessary
         """
         can_sell = False
+
+        for coin in (pair.from_coin, pair.to_coin):
+            if self.manager.is_ticker_stale(coin + self.config.BRIDGE_COIN):
+                logger.warning(
+                    f"Price of {term.yellow_bold(coin + self.config.BRIDGE_COIN)} is outdated, "
+                    f"not trading {term.yellow_bold(str(pair))}"
+                )
+                return None
+
         balance = self.manager.get_currency_balance(pair.from_coin.symbol)
         from_coin_price = self.manager.get_ticker_price(pair.from_coin + self.config.BRIDGE_COIN)
 
@@ -75,51 +96,57 @@ class Trader:
             logger.warning(f"{term.yellow_bold(coin + self.config.BRIDGE_COIN)} pair not found, skipping update")
             return
 
-        with self.database.db_session() as session:
-            for pair in session.query(Pair).filter(Pair.to_coin == coin):
-                from_coin_price = self.manager.get_ticker_price(pair.from_coin + self.config.BRIDGE_COIN)
+        ratios = []
 
-                if from_coin_price is None:
-                    logger.warning(
-                        f"{term.yellow_bold(coin + self.config.BRIDGE_COIN)} pair not found, skipping update"
-                    )
-                    continue
+        for pair in self.database.get_pairs_to(coin, only_enabled=False):
+            from_coin_price = self.manager.get_ticker_price(pair.from_coin + self.config.BRIDGE_COIN)
+
+            if from_coin_price is None:
+                logger.warning(
+                    f"{term.yellow_bold(coin + self.config.BRIDGE_COIN)} pair not found, skipping update"
+                )
+                continue
 
-                pair.ratio = from_coin_price / coin_price
+            ratios.append((pair, from_coin_price / coin_price))
+
+        self.database.set_pair_ratios(ratios)
+
+        for pair, ratio in ratios:
+            self.ratio_engine.set_target(pair, ratio)
 
     def initialize_trade_thresholds(self):
         """
         Initialize the buying threshold of all the coins for trading between them
         """
 
-        with self.database.db_session() as session:
-            for pair in session.query(Pair).filter(Pair.ratio.is_(None)).all():
-                if pair.from_coin.symbol == pair.to_coin.symbol:
-                    continue
+        ratios = []
 
-                if not pair.from_coin.enabled or not pair.to_coin.enabled:
-                    continue
+        for pair in self.database.get_pairs():
+            if pair.ratio is not None or pair.from_coin.symbol == pair.to_coin.symbol:
+                continue
 
-                logger.over(f"Initializing pair {term.yellow_bold(str(pair))}")
+            logger.over(f"Initializing pair {term.yellow_bold(str(pair))}")
 
-                from_coin_price = self.manager.get_ticker_price(pair.from_coin + self.config.BRIDGE_COIN)
-                if from_coin_price is None:
-                    logger.warning(
-                        f"{term.yellow_bold(pair.from_coin.symbol)} symbol not found, "
-                        f"skipping initialization"
-                    )
-                    continue
+            from_coin_price = self.manager.get_ticker_price(pair.from_coin + self.config.BRIDGE_COIN)
+            if from_coin_price is None:
+                logger.warning(
+                    f"{term.yellow_bold(pair.from_coin.symbol)} symbol not found, "
+                    f"skipping initialization"
+                )
+                continue
 
-                to_coin_price = self.manager.get_ticker_price(pair.to_coin + self.config.BRIDGE_COIN)
-                if to_coin_price is None:
-                    logger.warning(
-                        f"{term.yellow_bold(pair.to_coin.symbol)} symbol not found, "
-                        f"skipping initialization"
-                    )
-                    continue
+            to_coin_price = self.manager.get_ticker_price(pair.to_coin + self.config.BRIDGE_COIN)
+            if to_coin_price is None:
+                logger.warning(
+                    f"{term.yellow_bold(pair.to_coin.symbol)} symbol not found, "
+                    f"skipping initialization"
+                )
+                continue
+
+            ratios.append((pair, from_coin_price / to_coin_price))
+            logger.over(f"Initialized pair {term.yellow_bold(str(pair))}")
 
-                pair.ratio = from_coin_price / to_coin_price
-                logger.over(f"Initialized pair {term.yellow_bold(str(pair))}")
+        self.database.set_pair_ratios(ratios)
 
     def scout(self):
         """
@@ -127,37 +154,68 @@ class Trader:
         """
         raise NotImplementedError()
 
+    def get_watched_symbols(self):
+        """
+        Get the ticker symbols whose price changes can lead to a jump
+        """
+        current_coin = self.database.get_current_coin()
+
+        if current_coin is None:
+            return set()
+
+        return {
+            current_coin + self.config.BRIDGE_COIN,
+            *{pair.to_coin + self.config.BRIDGE_COIN for pair in self.database.get_pairs_from(current_coin)},
+        }
+
+    def run_scout(self):
+        """
+        Run a single scouting tick, deciding on a single snapshot of the market
+        """
+        coins = self.database.get_coins()
+        self.manager.update_fees(coins)
+        self.market = self.manager.capture_market(coins)
+        self._refresh_ratio_engine()
+
+        try:
+            self.scout()
+        finally:
+            self.database.flush_scout_history()
+
+    def _refresh_ratio_engine(self):
+        """
+        Load the bridge prices and the fees of every coin from the market snapshot into the ratio engine
+        """
+        self.ratio_engine.update_prices(self.market.prices)
+        self.ratio_engine.update_fees(lambda coin, selling: self.market.fee(coin.symbol, selling))
+
     def _get_ratios(self, coin, coin_price):
         """
         Given a coin, get the current price ratio for every other enabled coin
         """
-        ratio_dict = {}
+        return self._ratios_from_scores(coin, coin_price, self.ratio_engine.score_from(coin.symbol, coin_price))
 
-        for pair in self.database.get_pairs_from(coin):
-            optional_coin_price = self.manager.get_ticker_price(pair.to_coin + self.config.BRIDGE_COIN)
+    def _ratios_from_scores(self, coin, coin_price, scores):
+        """
+        Map the scores of every jump from a coin to their pair, logging the scouted prices
+        """
+        ratio_dict = {}
 
-            if optional_coin_price is None:
-                logger.warning(f"Optional pair {term.yellow_bold(str(pair))} not found, skipping")
-                continue
+        if scores is None:
+            return ratio_dict
 
-            self.database.log_scout(pair, pair.ratio, coin_price, optional_coin_price)
+        targets = self.ratio_engine.targets[self.ratio_engine.index[coin.symbol]]
 
-            # Obtain (current coin)/(optional coin)
-            coin_opt_coin_ratio = coin_price / optional_coin_price
+        for j, pair in self.ratio_engine.pairs_from(coin.symbol):
+            optional_coin_price = self.ratio_engine.prices[j]
 
-            # Fees
-            from_fee = self.manager.get_fee(pair.from_coin, self.config.BRIDGE_COIN, True)
-            to_fee = self.manager.get_fee(pair.to_coin, self.config.BRIDGE_COIN, False)
-            transaction_fee = from_fee + to_fee - from_fee * to_fee
+            if np.isnan(optional_coin_price) or np.isnan(self.ratio_engine.buy_fees[j]):
+                logger.warning(f"Optional pair {term.yellow_bold(str(pair))} not found, skipping")
+                continue
 
-            if self.config.USE_MARGIN == "yes":
-                ratio_dict[pair] = (
-                    (1 - transaction_fee) * coin_opt_coin_ratio / pair.ratio - 1 - self.config.SCOUT_MARGIN / 100
-                )
-            else:
-                ratio_dict[pair] = (
-                    coin_opt_coin_ratio - transaction_fee * self.config.SCOUT_MULTIPLIER * coin_opt_coin_ratio
-                ) - pair.ratio
+            target_ratio = None if np.isnan(targets[j]) else float(targets[j])
+            self.database.log_scout(pair, target_ratio, coin_price, float(optional_coin_price))
+            ratio_dict[pair] = float(scores[j])
         return ratio_dict
 
     def _jump_to_best_coin(self, coin, coin_price):
@@ -179,19 +237,21 @@ class Trader:
         """
         If we have any bridge coin leftover, buy a coin with it that we won't immediately trade out of
         """
-        bridge_balance = self.manager.get_currency_balance(self.config.BRIDGE_COIN.symbol)
+        bridge_balance = self.market.balance(self.config.BRIDGE_COIN_SYMBOL)
+        scores = self.ratio_engine.score_matrix()
 
-        for coin in self.database.get_coins():
-            current_coin_price = self.manager.get_ticker_price(coin + self.config.BRIDGE_COIN)
+        for coin in self.market.coins:
+            current_coin_price = self.market.price(coin.symbol)
 
             if current_coin_price is None:
                 continue
 
-            ratio_dict = self._get_ratios(coin, current_coin_price)
+            i = self.ratio_engine.index.get(coin.symbol)
+            ratio_dict = self._ratios_from_scores(coin, current_coin_price, None if i is None else scores[i])
 
             if not any(v > 0 for v in ratio_dict.values()):
                 # There will only be one coin where all the ratios are negative. When we find it, buy it if we can
-                if bridge_balance > self.manager.get_min_notional(coin.symbol, self.config.BRIDGE_COIN.symbol):
+                if bridge_balance > self.market.min_notional(coin.symbol):
                     self.logger.info(
                         f"Buying {term.yellow_bold(str(coin))} using "
                         f"{self.config.BRIDGE_COIN.symbol} bridge coin"
@@ -238,9 +298,8 @@ class Trader:
         Log the current balance total value in the currently held coin, BTC and the bridge coin.
         """
 
-        # Clear the cached balances once and only once
-        with self.manager.cache.open_balances() as open_balances:
-            open_balances.clear()
+        # Resynchronize the balances once and only once
+        self.manager.cache.balances.invalidate()
 
         with self.manager.cache.starting_balances() as starting_balances:
             filtered_coins = ["BTC", self.config.BRIDGE_COIN_SYMBOL, self.config.BALANCE_COIN_SYMBOL]